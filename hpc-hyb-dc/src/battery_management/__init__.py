@@ -1,12 +1,59 @@
-class Battery:
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from battery_model import MegawattBattery
+
+
+class Battery(MegawattBattery):
+    """
+    kW/kWh front end of MegawattBattery: soc_init and soc are 0-1
+    fractions, charge_kw() and discharge_kw() take and return kW (the
+    inherited charge()/discharge() stay in MW, so a Battery can go
+    wherever a MegawattBattery does), and the whole capacity is usable
+    unless min_soc/max_soc are given.
+    """
     def __init__(self, capacity_kwh, max_charge_kw, max_discharge_kw, soc_init=0.5,
-                 charge_eff=0.95, discharge_eff=0.95):
-        self.capacity = capacity_kwh  # in kWh
-        self.max_charge = max_charge_kw  # kW
-        self.max_discharge = max_discharge_kw  # kW
-        self.soc = soc_init  # Initial SOC (0 to 1)
-        self.charge_eff = charge_eff
-        self.discharge_eff = discharge_eff
+                 charge_eff=0.95, discharge_eff=0.95, min_soc=0.0, max_soc=1.0, **kwargs):
+        super().__init__(capacity_kwh / 1000, soc_init * 100, max_charge_kw / 1000,
+                         max_discharge_kw / 1000, charge_eff, discharge_eff,
+                         min_soc, max_soc, **kwargs)
+
+    @property
+    def capacity(self):
+        return self.capacity_mwh * 1000  # in kWh
+
+    @property
+    def max_charge(self):
+        return self.max_charge_power * 1000  # kW
+
+    @property
+    def max_discharge(self):
+        return self.max_discharge_power * 1000  # kW
+
+    @property
+    def soc(self):
+        return self.current_charge / self.capacity_mwh
+
+    @soc.setter
+    def soc(self, value):
+        self.current_charge = value * self.capacity_mwh
+
+    @property
+    def charge_eff(self):
+        return self.charge_efficiency
+
+    @property
+    def discharge_eff(self):
+        return self.discharge_efficiency
+
+    def charge_kw(self, power_kw, hours):
+        """Draw up to `power_kw` for `hours`; returns the power actually drawn (kW)."""
+        return self.charge(power_kw / 1000, hours) * 1000
+
+    def discharge_kw(self, power_kw, hours):
+        """Deliver up to `power_kw` for `hours`; returns the power actually delivered (kW)."""
+        return self.discharge(power_kw / 1000, hours) * 1000
 
     def __str__(self):
         return (f"Battery(capacity={self.capacity}kWh, max_charge={self.max_charge}kW, "
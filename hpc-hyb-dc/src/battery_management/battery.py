@@ -2,53 +2,101 @@ import numpy as np
 import matplotlib.pyplot as plt
 import pandas as pd
 from datetime import datetime, timedelta
+from fractions import Fraction
 import os
+import sys
+
+from dispatch_kernel import dispatch_kernel, dispatch_segments, ACTIONS
+from lp_dispatch import rolling_dispatch, classify_actions
+from mpc import mpc_dispatch
+from tariff import Tariff
+from battery_model import MegawattBattery
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from data_store import read_table
+
+try:
+    import pyarrow as pa
+except ImportError:          # optional: only needed for BMSHistory.to_arrow
+    pa = None
+
+# Default tariff windows (hour of day); pass RealTimeBMS a Tariff to use a price series
+CHEAP_ELECTRICITY_HOURS = [0, 1, 2, 3, 4, 5, 23]
+EXPENSIVE_ELECTRICITY_HOURS = [17, 18, 19, 20, 21]
+
+class BatteryBank:
+    """
+    Structure-of-arrays version of MegawattBattery: K batteries stepped at once.
+    Every attribute is a length-K float array and charge/discharge apply the
+    same clamping and efficiencies as MegawattBattery element-wise (no power
+    taper or degradation).
+    """
+    def __init__(self, capacity_mwh=100, initial_charge_percent=50,
+                 max_charge_power=50, max_discharge_power=50,
+                 charge_efficiency=1.0, discharge_efficiency=1.0):
+        capacity, initial, max_c, max_d, eff_c, eff_d = np.broadcast_arrays(
+            *(np.atleast_1d(np.asarray(v, dtype=float)) for v in
+              (capacity_mwh, initial_charge_percent, max_charge_power, max_discharge_power,
+               charge_efficiency, discharge_efficiency)))
+        self.capacity_mwh = capacity.copy()
+        self.current_charge = (initial / 100) * capacity
+        self.max_charge_power = max_c.copy()
+        self.max_discharge_power = max_d.copy()
+        self.charge_efficiency = eff_c.copy()
+        self.discharge_efficiency = eff_d.copy()
+
+        self.min_charge = 0.55 * self.capacity_mwh
+        self.max_charge_limit = 0.95 * self.capacity_mwh
+
+    @classmethod
+    def from_batteries(cls, batteries):
+        bank = cls([b.capacity_mwh for b in batteries], 0,
+                   [b.max_charge_power for b in batteries],
+                   [b.max_discharge_power for b in batteries],
+                   [b.charge_efficiency for b in batteries],
+                   [b.discharge_efficiency for b in batteries])
+        bank.current_charge = np.array([b.current_charge for b in batteries], dtype=float)
+        bank.min_charge = np.array([b.min_charge for b in batteries], dtype=float)
+        bank.max_charge_limit = np.array([b.max_charge_limit for b in batteries], dtype=float)
+        return bank
+
+    @classmethod
+    def sweep(cls, capacities_mwh, initial_charge_percents):
+        """One battery per (capacity, initial SoC) pair of the outer grid, capacity-major."""
+        cap, init = np.meshgrid(capacities_mwh, initial_charge_percents, indexing="ij")
+        return cls(cap.ravel(), init.ravel())
+
+    def __len__(self):
+        return len(self.capacity_mwh)
 
-class MegawattBattery:
-    def __init__(self, capacity_mwh=100, initial_charge_percent=50):
-        self.capacity_mwh = capacity_mwh 
-        self.current_charge = (initial_charge_percent / 100) * capacity_mwh
-        self.max_charge_power = 50  # MW
-        self.max_discharge_power = 50  # MW
-        
-        
-        self.min_charge = 0.55 * capacity_mwh  
-        self.max_charge_limit = 0.95 * capacity_mwh  
-        
     def get_charge_percentage(self):
         return (self.current_charge / self.capacity_mwh) * 100
-    
+
     def get_available_charge_capacity(self):
         return self.max_charge_limit - self.current_charge
-    
+
     def get_available_discharge_capacity(self):
         return self.current_charge - self.min_charge
-    
-    def charge(self, power_mw, hours):
-        if power_mw <= 0:
-            return 0
-
-        actual_power = min(power_mw, self.max_charge_power)
-        energy_to_add = actual_power * hours
 
-        available_capacity = self.get_available_charge_capacity()
-        energy_can_add = min(energy_to_add, available_capacity)
-        
+    def charge(self, power_mw, hours):
+        if hours <= 0:
+            return np.zeros(len(self))
+        power_mw = np.asarray(power_mw, dtype=float)
+        energy_to_add = np.minimum(power_mw, self.max_charge_power) * hours * self.charge_efficiency
+        energy_can_add = np.where(power_mw > 0,
+                                  np.minimum(energy_to_add, self.get_available_charge_capacity()), 0.0)
         self.current_charge += energy_can_add
-        return energy_can_add / hours if hours > 0 else 0
-    
+        return energy_can_add / (self.charge_efficiency * hours)
+
     def discharge(self, power_mw, hours):
-        if power_mw <= 0:
-            return 0
-            
-        actual_power = min(power_mw, self.max_discharge_power)
-        energy_to_remove = actual_power * hours
-        
-        available_energy = self.get_available_discharge_capacity()
-        energy_can_remove = min(energy_to_remove, available_energy)
-        
+        if hours <= 0:
+            return np.zeros(len(self))
+        power_mw = np.asarray(power_mw, dtype=float)
+        energy_to_remove = np.minimum(power_mw, self.max_discharge_power) * hours / self.discharge_efficiency
+        energy_can_remove = np.where(power_mw > 0,
+                                     np.minimum(energy_to_remove, self.get_available_discharge_capacity()), 0.0)
         self.current_charge -= energy_can_remove
-        return energy_can_remove / hours if hours > 0 else 0  
+        return energy_can_remove * self.discharge_efficiency / hours
 
 class MegawattDataCenter:
     def __init__(self, base_power_mw=50):
@@ -66,18 +114,27 @@ class ExcessEnergyReader:
     def __init__(self, csv_file_path):
         self.csv_file_path = csv_file_path
         self.excess_data = None
+        self.excess_values = None
+        self.start_time = None
+        self.time_step_hours = None
         self.load_excess_data()
     
     def load_excess_data(self):
       
         try:
             
-            self.excess_data = pd.read_csv(self.csv_file_path)
-            
-            self.excess_data['Timestamp'] = pd.to_datetime(self.excess_data['Timestamp'])
+            # binary sidecar when fresh, else CSV parse (Timestamp already datetime64)
+            self.excess_data = read_table(self.csv_file_path)
             
  
             self.excess_data = self.excess_data.sort_values('Timestamp')
+            self.excess_values = self.excess_data['Excess_MW'].to_numpy(dtype=float)
+            ts = self.excess_data['Timestamp'].to_numpy()
+            self.start_time = ts[0]
+            if len(ts) > 1:
+                # sampling step from the timestamps (median, so gaps do not skew it)
+                step_seconds = float(np.median(np.diff(ts) / np.timedelta64(1, 's')))
+                self.time_step_hours = step_seconds / 3600
             
             print(f"Loaded excess energy data")
             print(f"Data points: {len(self.excess_data)}")
@@ -88,55 +145,268 @@ class ExcessEnergyReader:
         except Exception as e:
             print(f"Error loading excess energy data: {e}")
             self.excess_data = None
+            self.excess_values = None
     
     def get_excess_energy_for_interval(self, interval_index):
-        if self.excess_data is None:
+        if self.excess_values is None:
             return 0
         
         try:
-            if interval_index >= len(self.excess_data):
+            if interval_index >= len(self.excess_values):
             
-                interval_index = interval_index % len(self.excess_data)
+                interval_index = interval_index % len(self.excess_values)
             
-            return max(0, self.excess_data['Excess_MW'].iloc[interval_index])
+            return max(0, float(self.excess_values[interval_index]))
             
         except Exception as e:
             print(f"Error getting excess energy for interval {interval_index}: {e}")
             return 0
 
+    def get_excess_array(self, total_intervals, start=0):
+        """Excess for intervals start..start+n-1 as one float array (same wrap-around and clipping)."""
+        return _wrapped_excess(self.excess_values, total_intervals, start)
+
+def _wrapped_excess(values, total_intervals, start):
+    if values is None or len(values) == 0:
+        return np.zeros(total_intervals)
+    n = len(values)
+    lo = start % n
+    if lo + total_intervals <= n:
+        # contiguous window: a plain slice (no index array, memmap-friendly)
+        return np.maximum(0, values[lo:lo + total_intervals])
+    return np.maximum(0, values[(start + np.arange(total_intervals)) % n])
+
+class StreamingExcessReader:
+    """
+    Bounded-memory excess reader for large, time-sorted telemetry CSVs.
+    The first open streams the CSV in `chunk_size` rows into a raw float64
+    sidecar (`<csv>.excess.f64`) and memory-maps it; later opens reuse the
+    sidecar while it is newer than the CSV. Per-interval access is an O(1)
+    array lookup, and iter_chunks() yields fixed-size blocks.
+    """
+    def __init__(self, csv_file_path, chunk_size=1_000_000, cache_path=None,
+                 time_step_hours=5 / 60, start_time=None):
+        self.csv_file_path = csv_file_path
+        self.chunk_size = chunk_size
+        self.cache_path = cache_path or f"{csv_file_path}.excess.f64"
+        self.time_step_hours = time_step_hours
+        self.start_time = start_time
+        self.excess_values = None
+        self.load_excess_data()
+
+    def _cache_is_fresh(self):
+        return (os.path.exists(self.cache_path) and
+                os.path.getmtime(self.cache_path) >= os.path.getmtime(self.csv_file_path))
+
+    def _build_cache(self):
+        tmp_path = self.cache_path + ".tmp"
+        last_ts = None
+        with open(tmp_path, 'wb') as out:
+            for chunk in pd.read_csv(self.csv_file_path, usecols=['Timestamp', 'Excess_MW'],
+                                     dtype={'Excess_MW': 'float64'}, chunksize=self.chunk_size):
+                ts = pd.to_datetime(chunk['Timestamp'], format='ISO8601').to_numpy()
+                if (last_ts is not None and len(ts) and ts[0] < last_ts) or (np.diff(ts) < np.timedelta64(0)).any():
+                    out.close()
+                    os.remove(tmp_path)
+                    raise ValueError(f"{self.csv_file_path} is not sorted by Timestamp; "
+                                     "use ExcessEnergyReader for unsorted files")
+                if len(ts):
+                    last_ts = ts[-1]
+                out.write(chunk['Excess_MW'].to_numpy(dtype=np.float64).tobytes())
+        os.replace(tmp_path, self.cache_path)
+
+    def load_excess_data(self):
+        try:
+            if not self._cache_is_fresh():
+                self._build_cache()
+            if os.path.getsize(self.cache_path) == 0:
+                self.excess_values = np.zeros(0)
+            else:
+                self.excess_values = np.memmap(self.cache_path, dtype=np.float64, mode='r')
+
+            print(f"Memory-mapped excess energy data ({self.cache_path})")
+            print(f"Data points: {len(self.excess_values)}")
+        except Exception as e:
+            print(f"Error loading excess energy data: {e}")
+            self.excess_values = None
+
+    def __len__(self):
+        return 0 if self.excess_values is None else len(self.excess_values)
+
+    def get_excess_energy_for_interval(self, interval_index):
+        if not len(self):
+            return 0
+        return max(0, float(self.excess_values[interval_index % len(self.excess_values)]))
+
+    def get_excess_array(self, total_intervals, start=0):
+        return _wrapped_excess(self.excess_values, total_intervals, start)
+
+    def iter_chunks(self, chunk_size=None, total_intervals=None):
+        """Yield (start, excess array) blocks of at most `chunk_size` intervals."""
+        chunk_size = chunk_size or self.chunk_size
+        total = len(self) if total_intervals is None else total_intervals
+        for start in range(0, total, chunk_size):
+            yield start, self.get_excess_array(min(chunk_size, total - start), start)
+
+HISTORY_COLUMNS = ['time_minutes', 'time_hours', 'battery_charge_mwh', 'battery_charge_percent',
+                   'power_needed_mw', 'excess_energy_mw', 'battery_power_mw', 'grid_power_mw',
+                   'unused_excess_mw']
+ACTION_CODES = {label: code for code, label in enumerate(ACTIONS)}
+
+class BMSHistory:
+    """
+    Preallocated columnar history for RealTimeBMS.
+    The numeric columns share one float64 block (one row per column) so
+    to_frame()/to_arrow() are zero-copy views; actions are int8 codes into
+    ACTIONS. history['col'] returns a view of the filled part of a column.
+    """
+    def __init__(self, capacity=0):
+        self._block = np.empty((len(HISTORY_COLUMNS), capacity))
+        self._action = np.empty(capacity, dtype=np.int8)
+        self._index = {name: i for i, name in enumerate(HISTORY_COLUMNS)}
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def reserve(self, capacity):
+        """Make room for `capacity` rows in total (grows geometrically)."""
+        if capacity <= self._block.shape[1]:
+            return
+        capacity = max(capacity, 2 * self._block.shape[1])
+        block = np.empty((len(HISTORY_COLUMNS), capacity))
+        block[:, :self.size] = self._block[:, :self.size]
+        action = np.empty(capacity, dtype=np.int8)
+        action[:self.size] = self._action[:self.size]
+        self._block, self._action = block, action
+
+    def append(self, values, action_code):
+        """Append one row; `values` follows HISTORY_COLUMNS order."""
+        if self.size == self._block.shape[1]:
+            self.reserve(self.size + 1)
+        self._block[:, self.size] = values
+        self._action[self.size] = action_code
+        self.size += 1
+
+    def extend(self, columns, action_codes):
+        """Append equal-length arrays; `columns` maps every HISTORY_COLUMNS name to an array."""
+        n = len(action_codes)
+        self.reserve(self.size + n)
+        for name, i in self._index.items():
+            self._block[i, self.size:self.size + n] = columns[name]
+        self._action[self.size:self.size + n] = action_codes
+        self.size += n
+
+    def __getitem__(self, name):
+        if name == 'action':
+            return np.array(ACTIONS, dtype=object)[self.action_codes]
+        return self._block[self._index[name], :self.size]
+
+    @property
+    def action_codes(self):
+        return self._action[:self.size]
+
+    def to_frame(self, start=0):
+        """DataFrame view over rows [start, size); numeric columns share memory with the buffer."""
+        df = pd.DataFrame(self._block[:, start:self.size].T, columns=HISTORY_COLUMNS, copy=False)
+        df['action'] = pd.Categorical.from_codes(self._action[start:self.size], ACTIONS)
+        return df
+
+    def to_arrow(self, start=0):
+        """pyarrow Table view over rows [start, size); action is a dictionary column."""
+        if pa is None:
+            raise ImportError("to_arrow needs pyarrow")
+        arrays = [pa.array(self._block[i, start:self.size]) for i in range(len(HISTORY_COLUMNS))]
+        arrays.append(pa.DictionaryArray.from_arrays(self._action[start:self.size], list(ACTIONS)))
+        return pa.Table.from_arrays(arrays, names=HISTORY_COLUMNS + ['action'])
+
+def step_label(seconds):
+    """'5-minute', '1-second', '1-hour', ... for a time step in seconds."""
+    for unit, size in (("hour", 3600), ("minute", 60)):
+        if seconds % size == 0:
+            return f"{seconds // size}-{unit}"
+    return f"{seconds}-second"
+
 class RealTimeBMS:
-    
-    def __init__(self, battery, datacenter, excess_reader):
+    """
+    Interval i starts at start_time + i * time_interval, where start_time is
+    the excess data's first timestamp. time_interval (hours, whole seconds)
+    defaults to the data's own sampling step; a finer step holds each
+    sample, a coarser one averages the samples it spans.
+    """
+    def __init__(self, battery, datacenter, excess_reader, tariff=None, time_interval=None):
         self.battery = battery
         self.datacenter = datacenter
         self.excess_reader = excess_reader
         
         
-        self.time_interval = 5 / 60 
-        
-        
-        self.cheap_electricity_hours = [0, 1, 2, 3, 4, 5, 23]  
-        self.expensive_electricity_hours = [17, 18, 19, 20, 21]  
+        data_step = getattr(excess_reader, 'time_step_hours', None) or 5 / 60
+        self.step_seconds = int(round((time_interval or data_step) * 3600))
+        if self.step_seconds <= 0:
+            raise ValueError("time_interval must be at least one second")
+        self.time_interval = self.step_seconds / 3600
+        self._data_ratio = Fraction(self.step_seconds, int(round(data_step * 3600)))
+        if self._data_ratio.numerator != 1 and self._data_ratio.denominator != 1:
+            raise ValueError(f"a {step_label(self.step_seconds)} step does not divide or span "
+                             f"whole {data_step * 60:g}-minute data samples")
+        start = getattr(excess_reader, 'start_time', None)
+        self.start_time = None if start is None else np.datetime64(start, 's')
+        self._start_second = 0 if start is None else \
+            int((self.start_time - self.start_time.astype('datetime64[D]')) // np.timedelta64(1, 's'))
+        
+        
+        if tariff is None:
+            tariff = Tariff.from_hour_lists(CHEAP_ELECTRICITY_HOURS, EXPENSIVE_ELECTRICITY_HOURS,
+                                            self.time_interval, self._start_second)
+        elif tariff.time_interval is not None and \
+                int(round(tariff.time_interval * 3600)) != self.step_seconds:
+            raise ValueError(f"the tariff has {step_label(int(round(tariff.time_interval * 3600)))} "
+                             f"intervals but the BMS steps are {step_label(self.step_seconds)}")
+        self.tariff = tariff
         
        
-        self.history = {
-            'time_minutes': [],
-            'time_hours': [],
-            'battery_charge_mwh': [],
-            'battery_charge_percent': [],
-            'power_needed_mw': [],
-            'excess_energy_mw': [],
-            'battery_power_mw': [],  
-            'grid_power_mw': [],
-            'unused_excess_mw': [],
-            'action': []
-        }
+        self.history = BMSHistory()
+        self.next_interval = 0
+        self.evaluated_intervals = 0
+
+    def intervals_for(self, hours):
+        """Number of time steps in `hours`."""
+        return int(round(hours * 3600 / self.step_seconds))
+
+    def hour_of_day(self, interval):
+        """Hour of day at the start of `interval` (an int or an int array)."""
+        seconds = self._start_second + np.asarray(interval, dtype=np.int64) * self.step_seconds
+        return seconds // 3600 % 24
+
+    def interval_times(self, n, start=0):
+        """Start timestamps of intervals start..start+n-1 (None without a start time)."""
+        if self.start_time is None:
+            return None
+        return self.start_time + (start + np.arange(n)) * np.timedelta64(self.step_seconds, 's')
+
+    def get_excess_array(self, n, start=0):
+        """Excess (MW) for intervals start..start+n-1, resampled from the data step."""
+        up, down = self._data_ratio.numerator, self._data_ratio.denominator
+        if up == down == 1:
+            return self.excess_reader.get_excess_array(n, start)
+        if down == 1:
+            # each step spans `up` samples: average power over the step
+            return self.excess_reader.get_excess_array(n * up, start * up).reshape(n, up).mean(axis=1)
+        # each sample spans `down` steps: hold it
+        first = start // down
+        samples = self.excess_reader.get_excess_array((start + n - 1) // down - first + 1, first)
+        return samples[(start + np.arange(n)) // down - first]
     
     def make_realtime_decision(self, interval_index):
        
-        current_hour = (interval_index * 5 / 60) % 24  
-        power_needed = self.datacenter.get_power_needed(int(current_hour))
-        excess_energy = self.excess_reader.get_excess_energy_for_interval(interval_index)
+        current_hour = int(self.hour_of_day(interval_index))
+        power_needed = self.datacenter.get_power_needed(current_hour)
+        if self._data_ratio == 1:
+            excess_energy = self.excess_reader.get_excess_energy_for_interval(interval_index)
+        else:
+            excess_energy = float(self.get_excess_array(1, interval_index)[0])
+        expensive = self.tariff.expensive_at(interval_index)
+        cheap = self.tariff.cheap_at(interval_index)
         
         battery_power = 0  
         grid_power = 0
@@ -161,8 +431,7 @@ class RealTimeBMS:
             else:
                 remaining_load = power_needed - excess_energy
                 
-                if int(current_hour) in self.expensive_electricity_hours and \
-                   self.battery.get_charge_percentage() > 10:
+                if expensive and self.battery.get_charge_percentage() > 10:
                     discharge_power = min(remaining_load, self.battery.max_discharge_power)
                     actual_discharge_power = self.battery.discharge(discharge_power, self.time_interval)
                     battery_power = actual_discharge_power  
@@ -172,15 +441,13 @@ class RealTimeBMS:
                     grid_power = remaining_load
                     action = "grid_supplement"
         else:
-            if int(current_hour) in self.expensive_electricity_hours and \
-               self.battery.get_charge_percentage() > 15:
+            if expensive and self.battery.get_charge_percentage() > 15:
                 discharge_power = min(power_needed, self.battery.max_discharge_power)
                 actual_discharge_power = self.battery.discharge(discharge_power, self.time_interval)
                 battery_power = actual_discharge_power
                 grid_power = power_needed - actual_discharge_power
                 action = "discharging_peak"
-            elif int(current_hour) in self.cheap_electricity_hours and \
-                 self.battery.get_charge_percentage() < 80:
+            elif cheap and self.battery.get_charge_percentage() < 80:
                 available_charge_capacity = self.battery.get_available_charge_capacity()
                 charge_power = min(20, self.battery.max_charge_power)  # 20 MW charge rate
                 actual_charge_power = self.battery.charge(charge_power, self.time_interval)
@@ -191,73 +458,97 @@ class RealTimeBMS:
                 grid_power = power_needed
                 action = "grid_only"
         
+        self.battery.advance(self.time_interval)
         return (action, battery_power, grid_power, power_needed, 
                 excess_energy, unused_excess)
     
-    def run_realtime_simulation(self, hours=24):
-        """Run real-time simulation with 5-minute intervals"""
-        print(f"Starting real-time simulation for {hours} hours (5-minute intervals)...")
+    def run_realtime_simulation(self, hours=24, fast=False, keep_history=True, event_driven=False):
+        """Run real-time simulation at the BMS time step.
+        fast=True runs the compiled dispatch kernel, which makes identical decisions;
+        with fast=True, keep_history=False keeps memory bounded on very long runs.
+        event_driven=True (implies fast) skips steps that cannot change the battery state."""
+        fast = fast or event_driven
+        print(f"Starting real-time simulation for {hours} hours "
+              f"({step_label(self.step_seconds)} intervals)...")
         print(f"Initial battery charge: {self.battery.get_charge_percentage():.1f}%")
         print(f"Battery capacity: {self.battery.capacity_mwh} MWh")
         print(f"Data center base load: {self.datacenter.base_power_mw} MW")
         print("-" * 80)
         
-        total_intervals = hours * 12
-        
-        total_excess_available = 0
-        total_excess_used = 0
-        total_grid_energy = 0
-        total_battery_charge_energy = 0
-        total_battery_discharge_energy = 0
-        
-        for interval in range(total_intervals):
+        total_intervals = self.intervals_for(hours)
+        initial_charge = self.battery.current_charge
+        evaluated_before = self.evaluated_intervals
+        if keep_history or not fast:
+            self.history.reserve(len(self.history) + total_intervals)
+        
+        if fast:
+            (total_excess_available, total_excess_used, total_grid_energy,
+             total_battery_charge_energy, total_battery_discharge_energy, total_load_energy,
+             total_grid_cost, total_export_revenue) = \
+                self.run_fast_dispatch(total_intervals, keep_history=keep_history,
+                                       event_driven=event_driven)
+        else:
+            total_excess_available = 0
+            total_excess_used = 0
+            total_grid_energy = 0
+            total_battery_charge_energy = 0
+            total_battery_discharge_energy = 0
+            total_grid_cost = 0
+            total_export_revenue = 0
+            steps_per_hour = max(1, 3600 // self.step_seconds)
+        
+            for interval in range(total_intervals):
             
-            action, battery_power, grid_power, power_needed, excess_energy, unused_excess = \
-                self.make_realtime_decision(interval)
+                action, battery_power, grid_power, power_needed, excess_energy, unused_excess = \
+                    self.make_realtime_decision(interval)
+                self.evaluated_intervals += 1
             
-            excess_energy_interval = excess_energy * self.time_interval
-            grid_energy_interval = grid_power * self.time_interval
+                excess_energy_interval = excess_energy * self.time_interval
+                grid_energy_interval = grid_power * self.time_interval
             
             
-            total_excess_available += excess_energy_interval
-            total_excess_used += (excess_energy - unused_excess) * self.time_interval
-            total_grid_energy += grid_energy_interval
+                total_excess_available += excess_energy_interval
+                total_excess_used += (excess_energy - unused_excess) * self.time_interval
+                total_grid_energy += grid_energy_interval
+                total_grid_cost += grid_energy_interval * self.tariff.price_at(interval)
+                total_export_revenue += unused_excess * self.time_interval * \
+                    self.tariff.export_price_at(interval)
             
-            if battery_power < 0:  
-                total_battery_charge_energy += abs(battery_power) * self.time_interval
-            elif battery_power > 0: 
-                total_battery_discharge_energy += battery_power * self.time_interval
+                if battery_power < 0:  
+                    total_battery_charge_energy += abs(battery_power) * self.time_interval
+                elif battery_power > 0: 
+                    total_battery_discharge_energy += battery_power * self.time_interval
             
             
-            current_time_minutes = interval * 5
-            current_time_hours = current_time_minutes / 60
+                current_time_minutes = interval * self.step_seconds / 60
+                current_time_hours = interval * self.step_seconds / 3600
             
-            self.history['time_minutes'].append(current_time_minutes)
-            self.history['time_hours'].append(current_time_hours)
-            self.history['battery_charge_mwh'].append(self.battery.current_charge)
-            self.history['battery_charge_percent'].append(self.battery.get_charge_percentage())
-            self.history['power_needed_mw'].append(power_needed)
-            self.history['excess_energy_mw'].append(excess_energy)
-            self.history['battery_power_mw'].append(battery_power)
-            self.history['grid_power_mw'].append(grid_power)
-            self.history['unused_excess_mw'].append(unused_excess)
-            self.history['action'].append(action)
+                self.history.append((current_time_minutes, current_time_hours,
+                                     self.battery.current_charge,
+                                     self.battery.get_charge_percentage(),
+                                     power_needed, excess_energy, battery_power,
+                                     grid_power, unused_excess),
+                                    ACTION_CODES[action])
             
             
-            if interval % 12 == 0:
-                hour = interval // 12
-                print(f"Hour {hour:2d}: Battery {self.battery.get_charge_percentage():5.1f}% "
-                      f"({self.battery.current_charge:.1f} MWh) | "
-                      f"Excess: {excess_energy:6.1f}MW | Action: {action:15s} | "
-                      f"Load: {power_needed:5.1f}MW | Grid: {grid_power:5.1f}MW")
+                if interval % steps_per_hour == 0:
+                    hour = interval * self.step_seconds // 3600
+                    print(f"Hour {hour:2d}: Battery {self.battery.get_charge_percentage():5.1f}% "
+                          f"({self.battery.current_charge:.1f} MWh) | "
+                          f"Excess: {excess_energy:6.1f}MW | Action: {action:15s} | "
+                          f"Load: {power_needed:5.1f}MW | Grid: {grid_power:5.1f}MW")
         
         print("-" * 80)
         print("Real-time simulation completed!")
+        if event_driven:
+            print(f"Event-driven dispatch evaluated {self.evaluated_intervals - evaluated_before} "
+                  f"of {total_intervals} intervals")
         print(f"Final battery charge: {self.battery.get_charge_percentage():.1f}% "
               f"({self.battery.current_charge:.1f} MWh)")
         
         
-        total_load_energy = sum([p * self.time_interval for p in self.history['power_needed_mw']])
+        if not fast:
+            total_load_energy = self.history['power_needed_mw'].sum() * self.time_interval
         
         print(f"\nENERGY SUMMARY:")
         print(f"Total load energy needed: {total_load_energy:.1f} MWh")
@@ -276,12 +567,199 @@ class RealTimeBMS:
         
         
         if total_battery_charge_energy > 0:
-            battery_efficiency = (total_battery_discharge_energy / total_battery_charge_energy) * 100
-            print(f"Battery round-trip efficiency: {battery_efficiency:.1f}%")
-    
+            # energy in minus energy out, less what is still stored, was lost
+            battery_losses = max(0.0, total_battery_charge_energy - total_battery_discharge_energy -
+                                 (self.battery.current_charge - initial_charge))
+            print(f"Battery round-trip efficiency: {self.battery.round_trip_efficiency * 100:.1f}%")
+            print(f"Battery losses: {battery_losses:.1f} MWh")
+        
+        degradation = self.battery.degradation
+        if degradation is not None:
+            print(f"Battery state of health: {degradation.state_of_health * 100:.2f}% "
+                  f"({degradation.full_cycles:.1f} equivalent full cycles, "
+                  f"cycle damage {degradation.cycle_damage:.2e}, "
+                  f"calendar damage {degradation.calendar_damage:.2e})")
+        
+        print(f"\nCOST SUMMARY:")
+        print(f"Grid energy cost: ${total_grid_cost:,.2f}")
+        print(f"Export revenue (unused excess): ${total_export_revenue:,.2f}")
+        print(f"Net energy cost: ${total_grid_cost - total_export_revenue:,.2f}")
+    
+    def step(self, n_intervals):
+        """
+        Advance by `n_intervals` from where the previous step stopped, without
+        printing, and append the new rows to history. Returns the history row
+        of the first new interval, so a reader can fetch history.to_frame(row).
+        """
+        row = len(self.history)
+        self.run_fast_dispatch(n_intervals, start_interval=self.next_interval, verbose=False)
+        self.next_interval += n_intervals
+        return row
+
+    def run_fast_dispatch(self, total_intervals, chunk_size=1_000_000, keep_history=True,
+                          start_interval=0, verbose=True, event_driven=False):
+        """
+        Run dispatch_kernel over all intervals in blocks of `chunk_size`, carrying the
+        battery state between blocks. Fills history unless keep_history=False (for
+        bounded-memory runs over very long series) and returns the energy totals
+        (excess available, excess used, grid, battery charged, battery discharged, load)
+        in MWh followed by the grid cost and export revenue in $.
+        event_driven=True runs dispatch_segments instead, which gives the same results
+        but only steps through intervals where the inputs change or the battery moves.
+        """
+        power_table = np.array([self.datacenter.get_power_needed(h) for h in range(24)], dtype=float)
+        b = self.battery
+        dt = self.time_interval
+        if b.degradation is not None:
+            # capacity fade is applied between blocks, so keep blocks to a day
+            chunk_size = min(chunk_size, self.intervals_for(24))
+        steps_per_hour = max(1, 3600 // self.step_seconds)
+        totals = np.zeros(8)
+
+        for offset in range(0, total_intervals, chunk_size):
+            start = start_interval + offset
+            n = min(chunk_size, total_intervals - offset)
+            interval = np.arange(start, start + n)
+            power_needed = power_table[self.hour_of_day(interval)]
+            excess = self.get_excess_array(n, start)
+            expensive, cheap = self.tariff.tiers_for(n, start)
+            prices = self.tariff.prices_for(n, start)
+            export_prices = self.tariff.export_prices_for(n, start)
+            battery_args = (float(b.capacity_mwh), float(b.current_charge),
+                            float(b.max_charge_power), float(b.max_discharge_power),
+                            float(b.min_charge), float(b.max_charge_limit), dt,
+                            float(b.charge_efficiency), float(b.discharge_efficiency), float(b.taper_mwh))
+
+            if event_driven:
+                changed = np.flatnonzero((excess[1:] != excess[:-1]) |
+                                         (power_needed[1:] != power_needed[:-1]) |
+                                         (expensive[1:] != expensive[:-1]) |
+                                         (cheap[1:] != cheap[:-1])) + 1
+                run_start = np.concatenate(([0], changed))
+                (charge_mwh, charge_percent, battery_power, grid_power, unused_excess, action,
+                 seg_length, evaluated) = dispatch_segments(
+                    excess[run_start], power_needed[run_start], expensive[run_start],
+                    cheap[run_start], np.diff(np.append(run_start, n)), *battery_args)
+                seg_start = np.cumsum(seg_length) - seg_length
+                # per-segment sums of the per-interval series
+                weight = seg_length
+                prices = np.add.reduceat(prices, seg_start)
+                export_prices = np.add.reduceat(export_prices, seg_start)
+            else:
+                charge_mwh, charge_percent, battery_power, grid_power, unused_excess, action = \
+                    dispatch_kernel(excess, power_needed, expensive, cheap, *battery_args)
+                seg_length, evaluated, weight = None, n, 1
+            self.evaluated_intervals += evaluated
+            b.current_charge = float(charge_mwh[-1])
+            b.track(charge_mwh, dt * weight)
+
+            if keep_history:
+                rows = slice(None) if seg_length is None else \
+                    np.repeat(np.arange(len(seg_length)), seg_length)
+                self.history.extend({
+                    'time_minutes': interval * self.step_seconds / 60,
+                    'time_hours': interval * self.step_seconds / 3600,
+                    'battery_charge_mwh': charge_mwh[rows],
+                    'battery_charge_percent': charge_percent[rows],
+                    'power_needed_mw': power_needed,
+                    'excess_energy_mw': excess,
+                    'battery_power_mw': battery_power[rows],
+                    'grid_power_mw': grid_power[rows],
+                    'unused_excess_mw': unused_excess[rows],
+                }, action[rows])
+
+            if verbose:
+                hourly = np.arange((-start) % steps_per_hour, n, steps_per_hour)
+                rows = hourly if seg_length is None else \
+                    np.searchsorted(seg_start, hourly, side='right') - 1
+                for i, r in zip(hourly.tolist(), rows.tolist()):
+                    print(f"Hour {(start + i) * self.step_seconds // 3600:2d}: "
+                          f"Battery {charge_percent[r]:5.1f}% ({charge_mwh[r]:.1f} MWh) | "
+                          f"Excess: {excess[i]:6.1f}MW | Action: {ACTIONS[action[r]]:15s} | "
+                          f"Load: {power_needed[i]:5.1f}MW | Grid: {grid_power[r]:5.1f}MW")
+
+            battery_energy = battery_power * weight
+            totals += (excess.sum() * dt,
+                       (excess.sum() - (unused_excess * weight).sum()) * dt,
+                       (grid_power * weight).sum() * dt,
+                       -battery_energy[battery_energy < 0].sum() * dt,
+                       battery_energy[battery_energy > 0].sum() * dt,
+                       power_needed.sum() * dt,
+                       grid_power @ prices * dt,
+                       unused_excess @ export_prices * dt)
+
+        return tuple(totals.tolist())
+
+    def get_load_array(self, n, start=0):
+        """Data center load (MW) for intervals start..start+n-1."""
+        power_table = np.array([self.datacenter.get_power_needed(h) for h in range(24)], dtype=float)
+        return power_table[self.hour_of_day(start + np.arange(n))]
+
+    def _load_and_prices(self, total_intervals, prices):
+        interval = np.arange(total_intervals)
+        if prices is None:
+            prices = self.tariff.prices_for(total_intervals)
+        return interval, self.get_load_array(total_intervals), np.asarray(prices, dtype=float)
+
+    def _record_plan(self, interval, power_needed, plan, action_codes):
+        self.history.extend({
+            'time_minutes': interval * self.step_seconds / 60,
+            'time_hours': interval * self.step_seconds / 3600,
+            'battery_charge_mwh': plan['soc'],
+            'battery_charge_percent': plan['soc'] / self.battery.capacity_mwh * 100,
+            'power_needed_mw': power_needed,
+            'excess_energy_mw': plan['excess'],
+            'battery_power_mw': plan['discharge'] - plan['charge'],
+            'grid_power_mw': plan['grid'],
+            'unused_excess_mw': plan['unused'],
+        }, action_codes)
+
+    def run_optimal_dispatch(self, total_intervals, prices=None, horizon=None, commit=None,
+                             solver=None, keep_history=True):
+        """
+        Cost-optimal alternative to the rule-based dispatch: rolling LP windows of
+        `horizon` intervals (committing `commit` at a time; both default to one day)
+        over the excess, load and price series with the same battery limits.
+        `prices` ($/MWh per interval) defaults to the BMS tariff; explicit
+        prices repeat after their end. Fills history and returns the grid cost in $.
+        """
+        horizon = horizon or self.intervals_for(24)
+        commit = commit or self.intervals_for(24)
+        price_fn = self.tariff.prices_for if prices is None else Tariff(prices).prices_for
+        interval, power_needed, prices = self._load_and_prices(total_intervals, prices)
+        plan = rolling_dispatch(self.battery, self.get_excess_array, self.get_load_array,
+                                price_fn, total_intervals, horizon, commit,
+                                self.time_interval, solver)
+        self.battery.track(plan['soc'], self.time_interval)
+        if keep_history:
+            self._record_plan(interval, power_needed, plan,
+                              classify_actions(plan['excess'], power_needed, plan['charge'],
+                                               plan['discharge'], plan['grid']))
+        return float((prices * plan['grid']).sum() * self.time_interval)
+
+    def run_mpc(self, total_intervals, horizon=None, forecast=None, prices=None,
+                solver=None, keep_history=True):
+        """
+        Model predictive control: every interval, plan `horizon` intervals (default:
+        one day) ahead from `forecast(n, start)` (default: the excess data itself,
+        i.e. a perfect forecast; see mpc.noisy_forecast) and apply only the first action.
+        The look-ahead takes its load and prices from the intervals past
+        the end of the run; explicit `prices` repeat after their end.
+        Fills history and returns the grid cost in $.
+        """
+        horizon = horizon or self.intervals_for(24)
+        price_fn = self.tariff.prices_for if prices is None else Tariff(prices).prices_for
+        interval, power_needed, prices = self._load_and_prices(total_intervals, prices)
+        excess_fn = self.get_excess_array
+        plan = mpc_dispatch(self.battery, excess_fn, forecast or excess_fn, self.get_load_array,
+                            price_fn, total_intervals, horizon, self.time_interval, solver)
+        if keep_history:
+            self._record_plan(interval, power_needed, plan, plan['action'])
+        return float((prices * plan['grid']).sum() * self.time_interval)
+
     def plot_realtime_results(self):
         """Create detailed plots for real-time simulation results"""
-        if not self.history['time_hours']:
+        if len(self.history) == 0:
             print("No data to plot!")
             return
         
@@ -325,8 +803,8 @@ class RealTimeBMS:
         axes[1,0].grid(True, alpha=0.3)
         axes[1,0].legend()
         
-        charging_power = [-p if p < 0 else 0 for p in self.history['battery_power_mw']]
-        discharging_power = [p if p > 0 else 0 for p in self.history['battery_power_mw']]
+        charging_power = np.maximum(-self.history['battery_power_mw'], 0)
+        discharging_power = np.maximum(self.history['battery_power_mw'], 0)
         
         axes[1,1].fill_between(self.history['time_hours'], charging_power, 
                                alpha=0.6, color='blue', label='Charging')
@@ -351,13 +829,12 @@ class RealTimeBMS:
         axes[2,0].legend()
         
         total_intervals = len(self.history['time_hours'])
-        excess_used = [ex - un for ex, un in zip(self.history['excess_energy_mw'], 
-                                                  self.history['unused_excess_mw'])]
+        excess_used = self.history['excess_energy_mw'] - self.history['unused_excess_mw']
         
         axes[2,1].fill_between(self.history['time_hours'], excess_used, 
                                alpha=0.7, color='green', label='Excess Energy')
         axes[2,1].fill_between(self.history['time_hours'], 
-                               [ex + gr for ex, gr in zip(excess_used, self.history['grid_power_mw'])], 
+                               excess_used + self.history['grid_power_mw'], 
                                excess_used, alpha=0.7, color='red', label='Grid Power')
         axes[2,1].set_xlabel('Time (hours)')
         axes[2,1].set_ylabel('Power (MW)')
@@ -414,7 +891,8 @@ def get_user_configuration():
     
     return capacity, initial_charge_percent, datacenter_power, hours
 
-def display_configuration(capacity, initial_charge_percent, datacenter_power, hours):
+def display_configuration(capacity, initial_charge_percent, datacenter_power, hours,
+                          time_step_hours=5 / 60):
     """Display the system configuration"""
     print("\n" + "="*60)
     print("REAL-TIME SYSTEM CONFIGURATION")
@@ -423,7 +901,8 @@ def display_configuration(capacity, initial_charge_percent, datacenter_power, ho
     print(f"Initial Charge:             {initial_charge_percent}% ({capacity * initial_charge_percent / 100:.1f} MWh)")
     print(f"Data Center Base Power:     {datacenter_power} MW")
     print(f"Simulation Duration:        {hours} hours")
-    print(f"Time Resolution:            5 minutes")
+    step = step_label(int(round(time_step_hours * 3600)))
+    print(f"Time Resolution:            {step} steps")
     print("="*60)
     
     print("\nBATTERY SPECIFICATIONS:")
@@ -433,7 +912,7 @@ def display_configuration(capacity, initial_charge_percent, datacenter_power, ho
     print(f"- Continuous operation:     Battery never fully discharges")
     
     print("\nREAL-TIME OPERATION:")
-    print("- 5-minute decision intervals")
+    print(f"- {step} decision intervals")
     print("- Excess energy prioritized for charging")
     print("- Smart grid interaction based on electricity pricing")
     print("- Continuous battery state monitoring")
@@ -442,7 +921,7 @@ def display_configuration(capacity, initial_charge_percent, datacenter_power, ho
 
 if __name__ == "__main__":
     print("=== REAL-TIME BATTERY MANAGEMENT SYSTEM ===")
-    print("With Excess Energy CSV Integration (5-minute resolution)\n")
+    print("With Excess Energy CSV Integration\n")
     
     csv_file = "excess_energy_output.csv"
     if not os.path.exists(csv_file):
@@ -457,7 +936,8 @@ if __name__ == "__main__":
     
     capacity, initial_charge_percent, datacenter_power, hours = get_user_configuration()
     
-    display_configuration(capacity, initial_charge_percent, datacenter_power, hours)
+    display_configuration(capacity, initial_charge_percent, datacenter_power, hours,
+                          excess_reader.time_step_hours or 5 / 60)
     
     # Ask for confirmation
     print("\nReady to run real-time simulation with excess energy data?")
@@ -476,6 +956,10 @@ if __name__ == "__main__":
     
     bms = RealTimeBMS(battery, datacenter, excess_reader)
     
+    price_file = input("Price CSV for the tariff (blank for time-of-use hours): ").strip()
+    if price_file:
+        bms.tariff = Tariff.from_csv(price_file, start=bms.start_time, time_interval=bms.time_interval)
+    
     bms.run_realtime_simulation(hours=hours)
     
     print("\nWould you like to see the results graphically?")
@@ -487,7 +971,7 @@ if __name__ == "__main__":
     
     print("\n=== REAL-TIME SYSTEM EXPLANATION ===")
     print("What happened in the real-time simulation:")
-    print("1. System operates with 5-minute decision intervals")
+    print(f"1. System operates with {step_label(bms.step_seconds)} decision intervals")
     print("2. Excess energy directly charges battery when available")
     print("3. Battery provides power during peak pricing hours")
     print("4. Grid power used as backup when needed")
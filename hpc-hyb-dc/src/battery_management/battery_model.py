@@ -0,0 +1,99 @@
+"""
+The battery model shared by the dispatchers.
+
+MegawattBattery keeps the stored energy (MWh) inside a SoC window and
+applies charge/discharge efficiencies, SoC-dependent power limits (the
+charge limit tapers off linearly near full and the discharge limit near
+the floor) and, given a DegradationModel, capacity fade from cycle and
+calendar ageing. The defaults are the original lossless 50 MW battery.
+"""
+
+class MegawattBattery:
+    def __init__(self, capacity_mwh=100, initial_charge_percent=50,
+                 max_charge_power=50, max_discharge_power=50,
+                 charge_efficiency=1.0, discharge_efficiency=1.0,
+                 min_soc=0.55, max_soc=0.95, taper_percent=0.0, degradation=None):
+        self.rated_capacity_mwh = capacity_mwh
+        self.capacity_mwh = capacity_mwh
+        self.current_charge = (initial_charge_percent / 100) * capacity_mwh
+        self.max_charge_power = max_charge_power  # MW
+        self.max_discharge_power = max_discharge_power  # MW
+        self.charge_efficiency = charge_efficiency
+        self.discharge_efficiency = discharge_efficiency
+
+        self.min_soc = min_soc
+        self.max_soc = max_soc
+        self.min_charge = min_soc * capacity_mwh
+        self.max_charge_limit = max_soc * capacity_mwh
+        # width (MWh) of the band next to each SoC limit over which power tapers to zero
+        self.taper_mwh = taper_percent / 100 * capacity_mwh
+        self.degradation = degradation
+
+    @property
+    def round_trip_efficiency(self):
+        return self.charge_efficiency * self.discharge_efficiency
+
+    def get_charge_percentage(self):
+        return (self.current_charge / self.capacity_mwh) * 100
+
+    def get_available_charge_capacity(self):
+        return self.max_charge_limit - self.current_charge
+
+    def get_available_discharge_capacity(self):
+        return self.current_charge - self.min_charge
+
+    def charge_power_limit(self):
+        if self.taper_mwh <= 0:
+            return self.max_charge_power
+        return self.max_charge_power * min(1.0, max(0.0, self.get_available_charge_capacity() / self.taper_mwh))
+
+    def discharge_power_limit(self):
+        if self.taper_mwh <= 0:
+            return self.max_discharge_power
+        return self.max_discharge_power * min(1.0, max(0.0, self.get_available_discharge_capacity() / self.taper_mwh))
+
+    def charge(self, power_mw, hours):
+        """Draw up to `power_mw` for `hours`; returns the power actually drawn."""
+        if power_mw <= 0:
+            return 0
+
+        actual_power = min(power_mw, self.charge_power_limit())
+        energy_to_add = actual_power * hours * self.charge_efficiency
+
+        available_capacity = self.get_available_charge_capacity()
+        energy_can_add = min(energy_to_add, available_capacity)
+
+        self.current_charge += energy_can_add
+        return energy_can_add / (self.charge_efficiency * hours) if hours > 0 else 0
+
+    def discharge(self, power_mw, hours):
+        """Deliver up to `power_mw` for `hours`; returns the power actually delivered."""
+        if power_mw <= 0:
+            return 0
+
+        actual_power = min(power_mw, self.discharge_power_limit())
+        energy_to_remove = actual_power * hours / self.discharge_efficiency
+
+        available_energy = self.get_available_discharge_capacity()
+        energy_can_remove = min(energy_to_remove, available_energy)
+
+        self.current_charge -= energy_can_remove
+        return energy_can_remove * self.discharge_efficiency / hours if hours > 0 else 0
+
+    def advance(self, hours):
+        """End a time step of `hours`: age the battery at its current SoC."""
+        if self.degradation is not None:
+            self.degradation.update(self.current_charge / self.rated_capacity_mwh, hours)
+            self._apply_fade()
+
+    def track(self, charge_mwh, hours):
+        """advance() for a run of steps whose end-of-step charges are `charge_mwh`."""
+        if self.degradation is not None:
+            self.degradation.extend(charge_mwh / self.rated_capacity_mwh, hours)
+            self._apply_fade()
+
+    def _apply_fade(self):
+        self.capacity_mwh = self.rated_capacity_mwh * self.degradation.state_of_health
+        self.min_charge = self.min_soc * self.capacity_mwh
+        self.max_charge_limit = self.max_soc * self.capacity_mwh
+        self.current_charge = min(self.current_charge, self.max_charge_limit)
@@ -0,0 +1,171 @@
+"""
+Compiled fast path for the RealTimeBMS dispatch loop.
+
+dispatch_kernel runs the same rules as RealTimeBMS.make_realtime_decision
+over plain float arrays and returns the full history arrays;
+dispatch_segments is its event-driven variant, which skips intervals that
+cannot change the battery state. Both are compiled with numba when
+available and fall back to plain Python (same results, no speed-up)
+otherwise.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:          # optional: run the kernel uncompiled
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+# Action codes stored in the history; ACTIONS[code] gives the label
+ACTIONS = ("idle", "charging_excess", "excess_covers_load", "discharging_peak",
+           "grid_supplement", "charging_cheap", "grid_only")
+IDLE, CHARGING_EXCESS, EXCESS_COVERS_LOAD, DISCHARGING_PEAK, \
+    GRID_SUPPLEMENT, CHARGING_CHEAP, GRID_ONLY = range(len(ACTIONS))
+
+
+@njit(cache=True, nogil=True)
+def _charge(state, power_mw, hours, max_charge_power, max_charge_limit, efficiency, taper_mwh):
+    # MegawattBattery.charge on state[0]
+    if power_mw <= 0:
+        return 0.0
+    limit = max_charge_power
+    if taper_mwh > 0:
+        limit = max_charge_power * min(1.0, max(0.0, (max_charge_limit - state[0]) / taper_mwh))
+    actual_power = min(power_mw, limit)
+    energy_can_add = min(actual_power * hours * efficiency, max_charge_limit - state[0])
+    state[0] += energy_can_add
+    return energy_can_add / (efficiency * hours) if hours > 0 else 0.0
+
+
+@njit(cache=True, nogil=True)
+def _discharge(state, power_mw, hours, max_discharge_power, min_charge, efficiency, taper_mwh):
+    # MegawattBattery.discharge on state[0]
+    if power_mw <= 0:
+        return 0.0
+    limit = max_discharge_power
+    if taper_mwh > 0:
+        limit = max_discharge_power * min(1.0, max(0.0, (state[0] - min_charge) / taper_mwh))
+    actual_power = min(power_mw, limit)
+    energy_can_remove = min(actual_power * hours / efficiency, state[0] - min_charge)
+    state[0] -= energy_can_remove
+    return energy_can_remove * efficiency / hours if hours > 0 else 0.0
+
+
+@njit(cache=True, nogil=True)
+def _decide(state, ex, need, expensive, cheap, capacity_mwh, max_charge_power, max_discharge_power,
+            min_charge, max_charge_limit, time_interval, charge_efficiency, discharge_efficiency,
+            taper_mwh):
+    # one interval of the rules; returns (battery_power, grid_power, unused_excess, action)
+    pct = (state[0] / capacity_mwh) * 100
+
+    if ex > 0:
+        if ex >= need:
+            remaining_excess = ex - need
+            if remaining_excess > 0 and pct < 90:
+                charge_power = min(remaining_excess, max_charge_power)
+                actual = _charge(state, charge_power, time_interval,
+                                 max_charge_power, max_charge_limit,
+                                 charge_efficiency, taper_mwh)
+                return -actual, 0.0, remaining_excess - actual, CHARGING_EXCESS
+            return 0.0, 0.0, remaining_excess, EXCESS_COVERS_LOAD
+        remaining_load = need - ex
+        if expensive and pct > 10:
+            discharge_power = min(remaining_load, max_discharge_power)
+            actual = _discharge(state, discharge_power, time_interval,
+                                max_discharge_power, min_charge,
+                                discharge_efficiency, taper_mwh)
+            return actual, remaining_load - actual, 0.0, DISCHARGING_PEAK
+        return 0.0, remaining_load, 0.0, GRID_SUPPLEMENT
+
+    if expensive and pct > 15:
+        discharge_power = min(need, max_discharge_power)
+        actual = _discharge(state, discharge_power, time_interval,
+                            max_discharge_power, min_charge,
+                            discharge_efficiency, taper_mwh)
+        return actual, need - actual, 0.0, DISCHARGING_PEAK
+    if cheap and pct < 80:
+        charge_power = min(20.0, max_charge_power)
+        actual = _charge(state, charge_power, time_interval,
+                         max_charge_power, max_charge_limit,
+                         charge_efficiency, taper_mwh)
+        return -actual, need + actual, 0.0, CHARGING_CHEAP
+    return 0.0, need, 0.0, GRID_ONLY
+
+
+@njit(cache=True, nogil=True)
+def dispatch_kernel(excess, power_needed, expensive, cheap,
+                    capacity_mwh, initial_charge, max_charge_power, max_discharge_power,
+                    min_charge, max_charge_limit, time_interval,
+                    charge_efficiency=1.0, discharge_efficiency=1.0, taper_mwh=0.0):
+    """
+    excess, power_needed: float64[n]; expensive, cheap: bool[n] tariff
+    tiers per interval (Tariff.tiers_for). The battery arguments are the
+    MegawattBattery attributes of the same names.
+    Returns (charge_mwh, charge_percent, battery_power, grid_power,
+    unused_excess, action_code) arrays of length n.
+    """
+    n = excess.shape[0]
+    charge_mwh = np.empty(n)
+    charge_percent = np.empty(n)
+    battery_power = np.zeros(n)
+    grid_power = np.zeros(n)
+    unused_excess = np.zeros(n)
+    action = np.zeros(n, dtype=np.int8)
+    state = np.array([initial_charge])
+
+    for i in range(n):
+        battery_power[i], grid_power[i], unused_excess[i], action[i] = _decide(
+            state, excess[i], power_needed[i], expensive[i], cheap[i],
+            capacity_mwh, max_charge_power, max_discharge_power, min_charge, max_charge_limit,
+            time_interval, charge_efficiency, discharge_efficiency, taper_mwh)
+        charge_mwh[i] = state[0]
+        charge_percent[i] = (state[0] / capacity_mwh) * 100
+
+    return charge_mwh, charge_percent, battery_power, grid_power, unused_excess, action
+
+
+@njit(cache=True, nogil=True)
+def dispatch_segments(excess, power_needed, expensive, cheap, run_length,
+                      capacity_mwh, initial_charge, max_charge_power, max_discharge_power,
+                      min_charge, max_charge_limit, time_interval,
+                      charge_efficiency=1.0, discharge_efficiency=1.0, taper_mwh=0.0):
+    """
+    Event-driven dispatch_kernel over runs of identical inputs: run k holds
+    run_length[k] intervals of excess[k], power_needed[k], expensive[k] and
+    cheap[k]. Once an interval leaves the battery charge unchanged, the
+    rest of its run would repeat it exactly, so it is emitted as one
+    segment without stepping. Returns the dispatch_kernel arrays per
+    segment, the segment lengths and the number of intervals evaluated.
+    """
+    n = 0
+    for k in range(run_length.shape[0]):
+        n += run_length[k]
+    charge_mwh = np.empty(n)
+    charge_percent = np.empty(n)
+    battery_power = np.zeros(n)
+    grid_power = np.zeros(n)
+    unused_excess = np.zeros(n)
+    action = np.zeros(n, dtype=np.int8)
+    seg_length = np.zeros(n, dtype=np.int64)
+    state = np.array([initial_charge])
+
+    s = 0
+    for k in range(run_length.shape[0]):
+        left = run_length[k]
+        while left > 0:
+            before = state[0]
+            battery_power[s], grid_power[s], unused_excess[s], action[s] = _decide(
+                state, excess[k], power_needed[k], expensive[k], cheap[k],
+                capacity_mwh, max_charge_power, max_discharge_power, min_charge, max_charge_limit,
+                time_interval, charge_efficiency, discharge_efficiency, taper_mwh)
+            charge_mwh[s] = state[0]
+            charge_percent[s] = (state[0] / capacity_mwh) * 100
+            seg_length[s] = left if state[0] == before else 1
+            left -= seg_length[s]
+            s += 1
+
+    return (charge_mwh[:s], charge_percent[:s], battery_power[:s], grid_power[:s],
+            unused_excess[:s], action[:s], seg_length[:s], s)
@@ -0,0 +1,181 @@
+"""
+Monte Carlo ensemble for the real-time BMS.
+
+Runs many stochastic wind/solar/load scenarios through the same dispatch
+rules as RealTimeBMS.make_realtime_decision, stepping every scenario at
+once as array math. Scenarios are generated one day at a time so memory
+stays O(scenarios x 288); chunks of scenarios can be farmed out to a
+process pool. Reports P10/P50/P90 bands for grid energy, unused excess and
+state of charge.
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../renewable_intake'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../hpp-core'))
+from battery import (BatteryBank, MegawattDataCenter,
+                     CHEAP_ELECTRICITY_HOURS, EXPENSIVE_ELECTRICITY_HOURS)
+from wind_in import generate_wind_scenarios, calc_power_array, WIND_FARM, HPC_ALLOCATION_MAX
+from solar_in import simulate_array
+from hpc_dc_config import build_load_profile
+
+INTERVALS_PER_DAY = 288
+TIME_INTERVAL = 5 / 60
+PERCENTILES = (10, 50, 90)
+
+
+def generate_excess_day(day_start, n_scenarios, rng, dc_size_mw=10,
+                        solar_scale=1.0, cloud_range=(0.2, 1.0), load_noise=0.03):
+    """
+    One day of stochastic excess renewable power, shape (n_scenarios, 288).
+    Wind turbulence comes from wind_in, solar is the deterministic PV day
+    scaled by a per-scenario cloud factor, and the HPC load profile gets
+    multiplicative Gaussian noise.
+    """
+    _, speeds = generate_wind_scenarios(day_start, INTERVALS_PER_DAY, n_scenarios, rng)
+    wind_mw = calc_power_array(speeds, WIND_FARM) * HPC_ALLOCATION_MAX
+
+    ts = np.datetime64(day_start, "m") + np.arange(INTERVALS_PER_DAY) * np.timedelta64(5, "m")
+    solar_mw = simulate_array(ts)["AC_kW"] / 1000.0 * solar_scale
+    clouds = rng.uniform(*cloud_range, size=(n_scenarios, 1))
+
+    load_mw = build_load_profile(dc_size_mw)["Load_kW"].to_numpy() / 1000.0
+    load_mw = load_mw * rng.normal(1.0, load_noise, size=(n_scenarios, INTERVALS_PER_DAY))
+
+    return np.maximum(0, wind_mw + solar_mw * clouds - load_mw)
+
+
+def dispatch_step(bank, excess, power_needed, hour, dt=TIME_INTERVAL):
+    """
+    Apply the RealTimeBMS rules to every battery in `bank` at once.
+    Returns (battery_power, grid_power, unused_excess) arrays.
+    """
+    pct = bank.get_charge_percentage()
+    expensive = hour in EXPENSIVE_ELECTRICITY_HOURS
+    cheap = hour in CHEAP_ELECTRICITY_HOURS
+
+    has_excess = excess > 0
+    covers = has_excess & (excess >= power_needed)
+    remaining = excess - power_needed
+
+    charge_excess = covers & (remaining > 0) & (pct < 90)
+    discharge_short = has_excess & ~covers & expensive & (pct > 10)
+    discharge_peak = ~has_excess & expensive & (pct > 15)
+    charge_cheap = ~has_excess & ~discharge_peak & cheap & (pct < 80)
+
+    charge_req = np.where(charge_excess, np.minimum(remaining, bank.max_charge_power),
+                          np.where(charge_cheap, np.minimum(20, bank.max_charge_power), 0.0))
+    discharge_req = np.where(discharge_short, np.minimum(-remaining, bank.max_discharge_power),
+                             np.where(discharge_peak, np.minimum(power_needed, bank.max_discharge_power), 0.0))
+
+    # a battery either charges or discharges in one step, so applying both is safe
+    charge_power = bank.charge(charge_req, dt)
+    discharge_power = bank.discharge(discharge_req, dt)
+
+    battery_power = discharge_power - charge_power
+    unused = np.where(covers, remaining - charge_power, 0.0)
+    grid = np.where(covers, 0.0,
+                    np.where(has_excess, -remaining - discharge_power,
+                             power_needed - discharge_power + charge_power))
+    return battery_power, grid, unused
+
+
+def _run_chunk(args):
+    n_scenarios, days, start, seed_seq, capacity_mwh, initial_charge_percent, \
+        datacenter_power, dc_size_mw, solar_scale, soc_stride = args
+    rng = np.random.default_rng(seed_seq)
+    bank = BatteryBank(np.broadcast_to(capacity_mwh, n_scenarios),
+                       np.broadcast_to(initial_charge_percent, n_scenarios))
+    datacenter = MegawattDataCenter(base_power_mw=datacenter_power)
+    power_table = [datacenter.get_power_needed(h) for h in range(24)]
+
+    grid_energy = np.zeros(n_scenarios)
+    unused_energy = np.zeros(n_scenarios)
+    min_soc = np.full(n_scenarios, np.inf)
+    soc_samples = []
+
+    for d in range(days):
+        excess = generate_excess_day(start + timedelta(days=d), n_scenarios, rng,
+                                     dc_size_mw, solar_scale)
+        for i in range(INTERVALS_PER_DAY):
+            hour = int((i * 5 / 60) % 24)
+            _, grid, unused = dispatch_step(bank, excess[:, i], power_table[hour], hour)
+            grid_energy += grid * TIME_INTERVAL
+            unused_energy += unused * TIME_INTERVAL
+            soc = bank.get_charge_percentage()
+            np.minimum(min_soc, soc, out=min_soc)
+            if i % soc_stride == 0:
+                soc_samples.append(soc.astype(np.float32))
+
+    final_soc = bank.get_charge_percentage()
+    return grid_energy, unused_energy, min_soc, final_soc, np.stack(soc_samples, axis=1)
+
+
+def run_ensemble(n_scenarios=1000, days=1, start=datetime(2025, 7, 11), seed=None,
+                 capacity_mwh=100, initial_charge_percent=50, datacenter_power=50,
+                 dc_size_mw=10, solar_scale=1.0, soc_stride=12,
+                 workers=1, chunk_size=2000):
+    """
+    Simulate `n_scenarios` stochastic trajectories of `days` days each.
+    Scenarios are split into chunks of `chunk_size`; with workers > 1 the
+    chunks run in a process pool. Results are reproducible for a given
+    (seed, chunk_size). SoC is sampled every `soc_stride` intervals.
+    `capacity_mwh` and `initial_charge_percent` may be per-scenario arrays
+    (e.g. from BatteryBank.sweep) to sweep battery sizing across the ensemble.
+    """
+    n_chunks = -(-n_scenarios // chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    capacity = np.broadcast_to(np.asarray(capacity_mwh, dtype=float), n_scenarios)
+    initial = np.broadcast_to(np.asarray(initial_charge_percent, dtype=float), n_scenarios)
+    tasks = []
+    for k in range(n_chunks):
+        sl = slice(k * chunk_size, min((k + 1) * chunk_size, n_scenarios))
+        tasks.append((sl.stop - sl.start, days, start, seeds[k], capacity[sl], initial[sl],
+                      datacenter_power, dc_size_mw, solar_scale, soc_stride))
+
+    if workers == 1:
+        parts = [_run_chunk(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_run_chunk, tasks))
+
+    grid_energy, unused_energy, min_soc, final_soc, soc = (np.concatenate(p) for p in zip(*parts))
+    return {
+        "n_scenarios": n_scenarios,
+        "days": days,
+        "grid_energy_mwh": grid_energy,
+        "unused_excess_mwh": unused_energy,
+        "min_soc_percent": min_soc,
+        "soc_time_hours": np.arange(soc.shape[1]) * soc_stride * TIME_INTERVAL,
+        "soc_bands": np.percentile(soc, PERCENTILES, axis=0),
+        "final_soc_percent": final_soc,
+    }
+
+
+def percentile_bands(values):
+    return dict(zip((f"P{p}" for p in PERCENTILES), np.percentile(values, PERCENTILES)))
+
+
+def print_ensemble_summary(result):
+    print(f"\nENSEMBLE SUMMARY ({result['n_scenarios']} scenarios x {result['days']} day(s)):")
+    print(f"{'':28s}" + "".join(f"{'P' + str(p):>10s}" for p in PERCENTILES))
+    for key, label in [("grid_energy_mwh", "Grid energy (MWh)"),
+                       ("unused_excess_mwh", "Unused excess (MWh)"),
+                       ("min_soc_percent", "Minimum SoC (%)"),
+                       ("final_soc_percent", "Final SoC (%)")]:
+        bands = percentile_bands(result[key])
+        print(f"{label:28s}" + "".join(f"{v:10.1f}" for v in bands.values()))
+
+
+if __name__ == "__main__":
+    import time
+    t0 = time.perf_counter()
+    result = run_ensemble(n_scenarios=10000, days=7, seed=42, workers=os.cpu_count())
+    print_ensemble_summary(result)
+    print(f"\nCompleted in {time.perf_counter() - t0:.1f} s")
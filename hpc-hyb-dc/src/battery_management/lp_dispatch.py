@@ -0,0 +1,180 @@
+"""
+Cost-optimal battery dispatch as a rolling-horizon linear program.
+
+Instead of RealTimeBMS's fixed hour lists and SoC thresholds, each window
+of `horizon` intervals is solved as an LP over the excess, load and price
+series with the MegawattBattery power and SoC limits and efficiencies (not
+the SoC power taper), and the first `commit` intervals are applied before
+the window rolls on. The model is built once with mutable parameters;
+each window only updates them, and a persistent solver (HiGHS via pyomo's
+appsi) re-solves from the previous basis. Other solvers get the previous
+solution as a warm start where they support it.
+
+pyomo and a solver (HiGHS, CBC or GLPK) are optional dependencies.
+"""
+
+import numpy as np
+
+try:
+    import pyomo.environ as pyo
+except ImportError:          # optional: only needed for the LP dispatcher
+    pyo = None
+
+from dispatch_kernel import ACTIONS
+
+# Tried in order; appsi_highs keeps the model in the solver between windows
+SOLVERS = ("appsi_highs", "highs", "cbc", "glpk")
+
+# Small cost on battery throughput so equal-cost solutions do not cycle
+THROUGHPUT_COST = 1e-3
+
+
+def pick_solver(preferred=None):
+    """First available solver from `preferred` (a name or sequence) or SOLVERS."""
+    if pyo is None:
+        raise ImportError("optimal dispatch needs pyomo (pip install pyomo highspy)")
+    names = (preferred,) if isinstance(preferred, str) else (preferred or SOLVERS)
+    for name in names:
+        solver = pyo.SolverFactory(name)
+        try:
+            if solver.available(exception_flag=False):
+                return name, solver
+        except Exception:
+            continue
+    raise RuntimeError(f"none of the LP solvers {names} is available")
+
+
+class DispatchLP:
+    """
+    One dispatch window of `horizon` intervals for a MegawattBattery-like
+    `battery`. Call solve(excess, load, price, start_charge) repeatedly;
+    only the mutable parameters change between calls.
+    """
+    def __init__(self, battery, horizon=288, time_interval=5 / 60, solver=None,
+                 hold_terminal_charge=True):
+        self.horizon = horizon
+        self.time_interval = time_interval
+        self.battery = battery
+        self.hold_terminal_charge = hold_terminal_charge
+        self.solver_name, self.solver = pick_solver(solver)
+        self.persistent = self.solver_name.startswith("appsi_")
+        self.model = self._build()
+        self._has_solution = False
+
+    def _build(self):
+        b = self.battery
+        dt = self.time_interval
+        eff_c, eff_d = b.charge_efficiency, b.discharge_efficiency
+        m = pyo.ConcreteModel()
+        m.T = pyo.RangeSet(0, self.horizon - 1)
+        m.excess = pyo.Param(m.T, mutable=True, initialize=0.0)
+        m.demand = pyo.Param(m.T, mutable=True, initialize=0.0)
+        m.price = pyo.Param(m.T, mutable=True, initialize=0.0)
+        m.start_charge = pyo.Param(mutable=True, initialize=float(b.current_charge))
+        m.charge_floor = pyo.Param(mutable=True, initialize=float(b.min_charge))
+        m.charge_ceiling = pyo.Param(mutable=True, initialize=float(b.max_charge_limit))
+        m.terminal_charge = pyo.Param(mutable=True, initialize=float(b.min_charge))
+
+        m.charge = pyo.Var(m.T, bounds=(0, b.max_charge_power))
+        m.discharge = pyo.Var(m.T, bounds=(0, b.max_discharge_power))
+        m.grid = pyo.Var(m.T, within=pyo.NonNegativeReals)
+        m.unused = pyo.Var(m.T, within=pyo.NonNegativeReals)
+        m.soc = pyo.Var(m.T)
+
+        m.balance = pyo.Constraint(m.T, rule=lambda m, t:
+                                   m.excess[t] + m.grid[t] + m.discharge[t]
+                                   == m.demand[t] + m.charge[t] + m.unused[t])
+        m.soc_step = pyo.Constraint(m.T, rule=lambda m, t:
+                                    m.soc[t] == (m.start_charge if t == 0 else m.soc[t - 1])
+                                    + (m.charge[t] * eff_c - m.discharge[t] / eff_d) * dt)
+        m.soc_floor = pyo.Constraint(m.T, rule=lambda m, t: m.soc[t] >= m.charge_floor)
+        m.soc_ceiling = pyo.Constraint(m.T, rule=lambda m, t: m.soc[t] <= m.charge_ceiling)
+        m.terminal = pyo.Constraint(expr=m.soc[self.horizon - 1] >= m.terminal_charge)
+        m.cost = pyo.Objective(expr=sum(m.price[t] * m.grid[t] * dt
+                                        + THROUGHPUT_COST * (m.charge[t] + m.discharge[t]) * dt
+                                        for t in m.T))
+        return m
+
+    def _warm_start(self, shift):
+        # shift the previous plan forward by `shift` intervals, repeating the last step
+        m = self.model
+        for var in (m.charge, m.discharge, m.grid, m.unused, m.soc):
+            values = [var[t].value for t in m.T]
+            for t in m.T:
+                var[t].set_value(values[min(t + shift, self.horizon - 1)], skip_validation=True)
+
+    def solve(self, excess, load, price, start_charge, shift=0):
+        """
+        Optimal plan for one window. Arrays must have `horizon` entries;
+        `shift` is how far the window moved since the last solve (for the
+        warm start). Power and SoC limits are read from the battery, so
+        capacity fade shows up in the next window. Returns (charge_mw, discharge_mw, grid_mw, unused_mw,
+        soc_mwh) arrays.
+        """
+        b = self.battery
+        m = self.model
+        for t in m.T:
+            m.excess[t] = float(excess[t])
+            m.demand[t] = float(load[t])
+            m.price[t] = float(price[t])
+        m.start_charge = float(start_charge)
+        for t in m.T:
+            m.charge[t].setub(float(b.max_charge_power))
+            m.discharge[t].setub(float(b.max_discharge_power))
+        # a battery starting outside its limits may not be pushed further out
+        m.charge_floor = min(float(b.min_charge), float(start_charge))
+        m.charge_ceiling = max(float(b.max_charge_limit), float(start_charge))
+        m.terminal_charge = min(float(start_charge), float(b.max_charge_limit)) \
+            if self.hold_terminal_charge else float(m.charge_floor.value)
+
+        kwargs = {}
+        if self._has_solution and not self.persistent and self.solver.warm_start_capable():
+            self._warm_start(shift)
+            kwargs["warmstart"] = True
+        result = self.solver.solve(m, **kwargs)
+        ok = result.solver.termination_condition == pyo.TerminationCondition.optimal
+        if not ok:
+            raise RuntimeError(f"{self.solver_name} did not find an optimal dispatch")
+        self._has_solution = True
+
+        return tuple(np.array([var[t].value for t in m.T], dtype=float)
+                     for var in (m.charge, m.discharge, m.grid, m.unused, m.soc))
+
+
+def classify_actions(excess, load, charge, discharge, grid, tol=1e-6):
+    """Map an LP plan onto the RealTimeBMS action labels (codes into ACTIONS)."""
+    code = {name: i for i, name in enumerate(ACTIONS)}
+    covers = excess >= load
+    action = np.where(covers, code["excess_covers_load"],
+                      np.where(excess > 0, code["grid_supplement"], code["grid_only"]))
+    action = np.where(discharge > tol, code["discharging_peak"], action)
+    action = np.where((charge > tol) & (grid > tol), code["charging_cheap"], action)
+    action = np.where((charge > tol) & (grid <= tol), code["charging_excess"], action)
+    return action.astype(np.int8)
+
+
+def rolling_dispatch(battery, excess_fn, load_fn, price_fn, total, horizon=288, commit=288,
+                     time_interval=5 / 60, solver=None):
+    """
+    Dispatch `total` intervals by solving `horizon`-interval windows and
+    applying the first `commit` intervals of each. excess_fn, load_fn and
+    price_fn are called as fn(n, start) for intervals start..start+n-1, so
+    a window running past the end of the run looks ahead in time.
+    Updates battery.current_charge and returns a dict of per-interval arrays.
+    """
+    lp = DispatchLP(battery, horizon, time_interval, solver)
+    out = {k: np.empty(total) for k in ("charge", "discharge", "grid", "unused", "soc", "excess")}
+    start, shift = 0, 0
+    while start < total:
+        excess = excess_fn(horizon, start)
+        charge, discharge, grid, unused, soc = lp.solve(excess, load_fn(horizon, start),
+                                                        price_fn(horizon, start),
+                                                        battery.current_charge, shift)
+        n = min(commit, total - start)
+        for key, arr in (("charge", charge), ("discharge", discharge), ("grid", grid),
+                         ("unused", unused), ("soc", soc), ("excess", excess)):
+            out[key][start:start + n] = arr[:n]
+        battery.current_charge = float(soc[n - 1])
+        start, shift = start + n, n
+    out["solver"] = lp.solver_name
+    return out
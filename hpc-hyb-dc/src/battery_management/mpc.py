@@ -0,0 +1,161 @@
+"""
+Model predictive control for the battery.
+
+At every 5-minute step the controller takes an N-step excess forecast,
+solves the dispatch LP of lp_dispatch over that horizon and applies only
+the first interval's battery action to the real battery; the next step
+re-plans from the resulting state. HighsDispatchLP holds the LP inside
+one HiGHS instance and only rewrites bounds and costs between steps, so
+each re-solve starts from the previous basis and a 24-hour horizon solves
+in milliseconds. Without highspy the pyomo DispatchLP (same interface,
+mutable parameters) is used instead.
+"""
+
+import numpy as np
+
+try:
+    import highspy
+except ImportError:          # optional: falls back to the pyomo model
+    highspy = None
+
+from lp_dispatch import DispatchLP, THROUGHPUT_COST, classify_actions
+
+
+class HighsDispatchLP:
+    """
+    The DispatchLP window as a HiGHS model built once. Columns are
+    [charge, discharge, grid, unused, soc] x horizon; rows are the power
+    balance and the SoC recursion for each interval.
+    """
+    def __init__(self, battery, horizon=288, time_interval=5 / 60):
+        if highspy is None:
+            raise ImportError("HighsDispatchLP needs highspy")
+        self.battery = battery
+        self.horizon = H = horizon
+        self.time_interval = dt = time_interval
+        self.solver_name = "highspy"
+        eff_c, eff_d = battery.charge_efficiency, battery.discharge_efficiency
+
+        t = np.arange(H)
+        c, d, g, u, s = (k * H + t for k in range(5))
+        bal, soc = t, H + t
+        # (column, row, value) triplets of the constraint matrix
+        entries = [
+            (c, bal, -1.0), (c, soc, -dt * eff_c),
+            (d, bal, 1.0), (d, soc, dt / eff_d),
+            (g, bal, 1.0),
+            (u, bal, -1.0),
+            (s, soc, 1.0), (s[:-1], soc[1:], -1.0),
+        ]
+        cols = np.concatenate([np.broadcast_to(e[0], np.shape(e[0])) for e in entries])
+        rows = np.concatenate([np.broadcast_to(e[1], np.shape(e[0])) for e in entries])
+        vals = np.concatenate([np.full(len(e[0]), e[2]) for e in entries])
+        order = np.lexsort((rows, cols))
+        cols, rows, vals = cols[order], rows[order], vals[order]
+
+        inf = highspy.kHighsInf
+        lp = highspy.HighsLp()
+        lp.num_col_ = 5 * H
+        lp.num_row_ = 2 * H
+        lp.col_cost_ = np.concatenate([np.full(2 * H, THROUGHPUT_COST * dt), np.zeros(3 * H)])
+        lp.col_lower_ = np.concatenate([np.zeros(4 * H), np.full(H, float(battery.min_charge))])
+        lp.col_upper_ = np.concatenate([np.full(H, float(battery.max_charge_power)),
+                                        np.full(H, float(battery.max_discharge_power)),
+                                        np.full(2 * H, inf),
+                                        np.full(H, float(battery.max_charge_limit))])
+        lp.row_lower_ = np.zeros(2 * H)
+        lp.row_upper_ = np.zeros(2 * H)
+        lp.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+        lp.a_matrix_.start_ = np.searchsorted(cols, np.arange(5 * H + 1)).astype(np.int32)
+        lp.a_matrix_.index_ = rows.astype(np.int32)
+        lp.a_matrix_.value_ = vals
+
+        self.highs = highspy.Highs()
+        self.highs.setOptionValue("output_flag", False)
+        self.highs.passModel(lp)
+        self._grid_cols = g.astype(np.int32)
+        self._bal_rows = bal.astype(np.int32)
+        self._battery_cols = np.concatenate([c, d, s]).astype(np.int32)
+
+    def solve(self, excess, load, price, start_charge, shift=0):
+        """Same contract as DispatchLP.solve; `shift` is unused (HiGHS keeps its basis)."""
+        b = self.battery
+        H, dt = self.horizon, self.time_interval
+        h = self.highs
+
+        rhs = np.asarray(load, dtype=float)[:H] - np.asarray(excess, dtype=float)[:H]
+        h.changeRowsBounds(H, self._bal_rows, rhs, rhs)
+        h.changeRowBounds(H, float(start_charge), float(start_charge))
+        h.changeColsCost(H, self._grid_cols, np.asarray(price, dtype=float)[:H] * dt)
+
+        # power and SoC limits come from the battery, which may have faded;
+        # a battery starting outside its SoC limits may not be pushed further out
+        floor = min(float(b.min_charge), float(start_charge))
+        soc_lower = np.full(H, floor)
+        soc_lower[-1] = max(floor, min(float(start_charge), float(b.max_charge_limit)))
+        lower = np.concatenate([np.zeros(2 * H), soc_lower])
+        upper = np.concatenate([np.full(H, float(b.max_charge_power)),
+                                np.full(H, float(b.max_discharge_power)),
+                                np.full(H, max(float(b.max_charge_limit), float(start_charge)))])
+        h.changeColsBounds(3 * H, self._battery_cols, lower, upper)
+
+        h.run()
+        if h.getModelStatus() != highspy.HighsModelStatus.kOptimal:
+            raise RuntimeError("HiGHS did not find an optimal dispatch")
+        x = np.asarray(h.getSolution().col_value)
+        return tuple(x[k * H:(k + 1) * H] for k in range(5))
+
+
+def make_dispatch_lp(battery, horizon=288, time_interval=5 / 60, solver=None):
+    """HighsDispatchLP when highspy is installed (and no other solver is asked for), else DispatchLP."""
+    if highspy is not None and solver in (None, "highspy"):
+        return HighsDispatchLP(battery, horizon, time_interval)
+    return DispatchLP(battery, horizon, time_interval, solver)
+
+
+def noisy_forecast(excess_fn, error_per_hour=0.05, seed=None, time_interval=5 / 60):
+    """
+    Wrap an exact excess source as a forecaster whose multiplicative error
+    grows with lead time (standard deviation `error_per_hour` per hour
+    ahead); the current interval is known exactly.
+    """
+    rng = np.random.default_rng(seed)
+
+    def forecast(n, start):
+        lead_hours = np.arange(n) * time_interval
+        noise = rng.normal(0.0, 1.0, n) * error_per_hour * np.sqrt(lead_hours)
+        return np.maximum(0.0, excess_fn(n, start) * (1 + noise))
+    return forecast
+
+
+def mpc_dispatch(battery, excess_fn, forecast_fn, load_fn, price_fn, total, horizon=288,
+                 time_interval=5 / 60, solver=None):
+    """
+    Step through `total` intervals: plan `horizon` intervals ahead from
+    forecast_fn(horizon, i), load_fn(horizon, i) and price_fn(horizon, i),
+    then apply the first planned battery power to `battery` against the
+    actual excess_fn(1, i). Returns per-interval arrays.
+    """
+    lp = make_dispatch_lp(battery, horizon, time_interval, solver)
+    actual = excess_fn(total, 0)
+    load = load_fn(total, 0)
+    out = {k: np.zeros(total) for k in ("charge", "discharge", "grid", "unused", "soc")}
+    out["excess"] = actual
+
+    for i in range(total):
+        charge, discharge, _, _, _ = lp.solve(forecast_fn(horizon, i), load_fn(horizon, i),
+                                              price_fn(horizon, i), battery.current_charge, 1)
+        planned = discharge[0] - charge[0]
+        if planned < 0:
+            out["charge"][i] = battery.charge(-planned, time_interval)
+        elif planned > 0:
+            out["discharge"][i] = battery.discharge(planned, time_interval)
+        battery.advance(time_interval)
+        net = actual[i] + out["discharge"][i] - out["charge"][i] - load[i]
+        out["unused"][i] = max(net, 0.0)
+        out["grid"][i] = max(-net, 0.0)
+        out["soc"][i] = battery.current_charge
+
+    out["action"] = classify_actions(actual, load, out["charge"], out["discharge"], out["grid"])
+    out["solver"] = lp.solver_name
+    return out
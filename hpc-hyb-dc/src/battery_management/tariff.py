@@ -0,0 +1,190 @@
+"""
+Electricity tariffs for the battery dispatchers.
+
+A Tariff is a price series aligned to the dispatch intervals ($/MWh per
+interval) with its price tiers worked out once: boolean cheap/expensive
+arrays, either from hour-of-day windows (the original RealTimeBMS rules)
+or from percentile thresholds over a real price series such as an AESO
+pool-price report. Dispatch then looks a tier up by interval index
+instead of searching an hour list. Like the excess data, the series
+repeats once a run goes past its end.
+"""
+
+import math
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from data_store import read_typed, SchemaError
+
+# Flat three-tier tariff ($/MWh) used for the hour-of-day windows
+CHEAP_PRICE = 30.0
+STANDARD_PRICE = 60.0
+PEAK_PRICE = 120.0
+
+# Price percentiles that mark cheap and expensive intervals of a price series
+CHEAP_PERCENTILE = 25
+EXPENSIVE_PERCENTILE = 75
+
+TIERS = ("cheap", "standard", "peak")
+CHEAP, STANDARD, PEAK = range(len(TIERS))
+
+# Columns of a generic Timestamp,Price CSV
+PRICE_SCHEMA = {"Price": ("Price", "price", "LMP", "Pool")}
+# AESO pool-price reports: "Date (HE)" like "01/31/2024 05" (hour ending, "02*" for the repeated DST hour)
+AESO_DATE_COLUMN = "Date (HE)"
+AESO_PRICE_COLUMN = "Price ($)"
+AESO_DATE_FORMAT = "%m/%d/%Y"
+
+
+def tier_prices(hours, cheap_hours, expensive_hours):
+    """Price per interval from the hour-of-day tariff windows."""
+    price = np.full(24, STANDARD_PRICE)
+    price[list(cheap_hours)] = CHEAP_PRICE
+    price[list(expensive_hours)] = PEAK_PRICE
+    return price[np.asarray(hours, dtype=np.int64) % 24]
+
+
+def _wrapped(values, n, start):
+    lo = start % len(values)
+    if lo + n <= len(values):
+        return values[lo:lo + n]
+    return values[(start + np.arange(n)) % len(values)]
+
+
+class Tariff:
+    """
+    prices: $/MWh per dispatch interval. cheap/expensive: optional boolean
+    arrays of the same length; when omitted, intervals at or below the
+    `cheap_percentile` price are cheap and those at or above the
+    `expensive_percentile` price are expensive. export_prices ($/MWh,
+    default: zero, i.e. no export credit) values the excess the battery
+    cannot take. time_interval is the interval length in hours the series
+    was built for (None: unknown).
+    """
+    def __init__(self, prices, cheap=None, expensive=None, cheap_percentile=CHEAP_PERCENTILE,
+                 expensive_percentile=EXPENSIVE_PERCENTILE, export_prices=None, time_interval=None):
+        self.prices = np.ascontiguousarray(prices, dtype=float)
+        self.time_interval = time_interval
+        if self.prices.ndim != 1 or len(self.prices) == 0:
+            raise ValueError("a tariff needs a non-empty 1-D price series")
+        self.cheap_threshold = float(np.percentile(self.prices, cheap_percentile))
+        self.expensive_threshold = float(np.percentile(self.prices, expensive_percentile))
+        # a flat series has no cheap or expensive intervals
+        spread = self.expensive_threshold > self.cheap_threshold
+        self.is_cheap = np.asarray(cheap, dtype=bool) if cheap is not None \
+            else spread & (self.prices <= self.cheap_threshold)
+        self.is_expensive = np.asarray(expensive, dtype=bool) if expensive is not None \
+            else spread & (self.prices >= self.expensive_threshold)
+        if self.is_cheap.shape != self.prices.shape or self.is_expensive.shape != self.prices.shape:
+            raise ValueError("tier arrays must match the price series")
+        self.is_cheap = self.is_cheap & ~self.is_expensive
+        self.tier = np.where(self.is_expensive, PEAK,
+                             np.where(self.is_cheap, CHEAP, STANDARD)).astype(np.int8)
+        self.export_prices = np.zeros_like(self.prices) if export_prices is None \
+            else np.ascontiguousarray(export_prices, dtype=float)
+
+    @classmethod
+    def from_hour_lists(cls, cheap_hours, expensive_hours, time_interval=5 / 60, start_second=0):
+        """
+        The three-tier tariff with the cheap/expensive hour-of-day windows,
+        for steps of `time_interval` hours starting `start_second` seconds
+        after midnight; the series covers one repeat of the daily pattern.
+        """
+        step = int(round(time_interval * 3600))
+        n = 86400 // math.gcd(86400, step)
+        hour = (start_second + np.arange(n, dtype=np.int64) * step) // 3600 % 24
+        return cls(tier_prices(hour, cheap_hours, expensive_hours),
+                   cheap=np.isin(hour, list(cheap_hours)),
+                   expensive=np.isin(hour, list(expensive_hours)),
+                   time_interval=time_interval)
+
+    @classmethod
+    def from_price_series(cls, timestamps, prices, start=None, time_interval=5 / 60, **kwargs):
+        """
+        Align a sorted price series (e.g. hourly) onto dispatch intervals
+        starting at `start`: each interval takes the latest price at or
+        before it. The aligned series runs to the end of the price data.
+        When `start` is not covered the series is used as a profile from
+        its own first timestamp.
+        """
+        ts = np.asarray(timestamps, dtype="datetime64[ns]")
+        prices = np.asarray(prices, dtype=float)
+        if len(ts) == 0:
+            raise ValueError("empty price series")
+        step = np.timedelta64(int(round(time_interval * 3600e9)), "ns")
+        last_step = np.diff(ts).min() if len(ts) > 1 else step
+        end = ts[-1] + last_step
+        start = ts[0] if start is None else np.datetime64(pd.Timestamp(start), "ns")
+        if not ts[0] <= start < end:
+            print(f"Price series ({ts[0]} to {ts[-1]}) does not cover {start}; "
+                  f"aligning from its first timestamp")
+            start = ts[0]
+        n = int(-(-(end - start) // step))
+        grid = start + np.arange(n) * step
+        return cls(prices[np.searchsorted(ts, grid, side="right") - 1],
+                   time_interval=time_interval, **kwargs)
+
+    @classmethod
+    def from_csv(cls, csv_path, start=None, time_interval=5 / 60, **kwargs):
+        """Tariff from a price CSV (see load_price_series), aligned as in from_price_series."""
+        ts, prices = load_price_series(csv_path)
+        print(f"Loaded {len(prices)} prices from {csv_path} "
+              f"(mean ${prices.mean():.2f}/MWh, max ${prices.max():.2f}/MWh)")
+        return cls.from_price_series(ts, prices, start, time_interval, **kwargs)
+
+    def __len__(self):
+        return len(self.prices)
+
+    def price_at(self, interval_index):
+        return float(self.prices[interval_index % len(self.prices)])
+
+    def cheap_at(self, interval_index):
+        return bool(self.is_cheap[interval_index % len(self.prices)])
+
+    def expensive_at(self, interval_index):
+        return bool(self.is_expensive[interval_index % len(self.prices)])
+
+    def export_price_at(self, interval_index):
+        return float(self.export_prices[interval_index % len(self.export_prices)])
+
+    def prices_for(self, n, start=0):
+        """Prices for intervals start..start+n-1."""
+        return _wrapped(self.prices, n, start)
+
+    def export_prices_for(self, n, start=0):
+        return _wrapped(self.export_prices, n, start)
+
+    def tiers_for(self, n, start=0):
+        """(expensive, cheap) boolean arrays for intervals start..start+n-1."""
+        return _wrapped(self.is_expensive, n, start), _wrapped(self.is_cheap, n, start)
+
+
+def load_price_series(csv_path):
+    """
+    (timestamps, prices) from either an AESO pool-price CSV ("Date (HE)",
+    "Price ($)") or a CSV with a Timestamp column and a price column.
+    AESO hour-ending labels become the start of the hour; the repeated
+    daylight-saving hour keeps its first price.
+    """
+    header = pd.read_csv(csv_path, nrows=0).columns
+    if AESO_DATE_COLUMN not in header:
+        df = read_typed(csv_path, PRICE_SCHEMA)
+        return df["Timestamp"].to_numpy(), df["Price"].to_numpy()
+
+    df = pd.read_csv(csv_path, usecols=[AESO_DATE_COLUMN, AESO_PRICE_COLUMN],
+                     dtype={AESO_DATE_COLUMN: str})
+    label = df[AESO_DATE_COLUMN].str.strip().str.rstrip("*")
+    try:
+        day = pd.to_datetime(label.str[:-3], format=AESO_DATE_FORMAT)
+        hour_ending = label.str[-2:].astype(int)
+        price = pd.to_numeric(df[AESO_PRICE_COLUMN], errors="raise")
+    except ValueError as e:
+        raise SchemaError(f"{csv_path}: {e}") from e
+    series = pd.Series(price.to_numpy(dtype=float),
+                       index=day + pd.to_timedelta(hour_ending - 1, unit="h"))
+    series = series[~series.index.duplicated()].sort_index()
+    return series.index.to_numpy(), series.to_numpy()
@@ -0,0 +1,3 @@
+from .columnar import read_table, write_table, table_hash, sidecar_path, \
+    write_binary_table, read_binary_table
+from .schema import read_typed, join_sorted, SchemaError, TIMESTAMP_FORMAT
@@ -0,0 +1,152 @@
+"""
+Binary columnar cache for the pipeline's intermediate CSVs.
+
+Every CSV written through write_table gets an `.npz` sidecar holding each
+column as a typed NumPy array (timestamps stay datetime64), the column
+order, a SHA-256 content hash and the size/mtime of the CSV it mirrors.
+read_table returns the sidecar when it still matches the CSV and falls
+back to parsing the CSV (and refreshing the sidecar) when it does not.
+Tables with no CSV at all use write_binary_table/read_binary_table, which
+keep the same format without a source signature.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+SIDECAR_SUFFIX = ".npz"
+
+
+def sidecar_path(csv_path):
+    return os.path.splitext(str(csv_path))[0] + SIDECAR_SUFFIX
+
+
+def _source_signature(csv_path):
+    if not os.path.exists(csv_path):
+        return np.array([-1, -1], dtype=np.int64)
+    st = os.stat(csv_path)
+    return np.array([st.st_size, st.st_mtime_ns], dtype=np.int64)
+
+
+def _column_arrays(df):
+    arrays = {}
+    for name in df.columns:
+        col = df[name]
+        if pd.api.types.is_datetime64_any_dtype(col):
+            arrays[name] = col.to_numpy(dtype="datetime64[ns]")
+        elif pd.api.types.is_numeric_dtype(col) or pd.api.types.is_bool_dtype(col):
+            arrays[name] = col.to_numpy()
+        else:
+            arrays[name] = col.astype(str).to_numpy(dtype=str)
+    return arrays
+
+
+def content_hash(arrays):
+    """SHA-256 over column names, dtypes and raw bytes, in column order."""
+    h = hashlib.sha256()
+    for name, arr in arrays.items():
+        h.update(name.encode())
+        h.update(arr.dtype.str.encode())
+        h.update(np.ascontiguousarray(arr).tobytes())
+    return h.hexdigest()
+
+
+def _save_arrays(path, arrays, **meta):
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path,
+             __columns__=np.array(list(arrays), dtype=str),
+             __hash__=np.array(content_hash(arrays)),
+             **meta,
+             **{f"col_{i}": arr for i, arr in enumerate(arrays.values())})
+    os.replace(tmp_path, path)
+
+
+def _load_arrays(npz):
+    """Column arrays of an opened .npz table, or None if they fail the content hash."""
+    names = [str(n) for n in npz["__columns__"]]
+    arrays = {name: npz[f"col_{i}"] for i, name in enumerate(names)}
+    if content_hash(arrays) != str(npz["__hash__"]):
+        return None
+    return arrays
+
+
+def _write_sidecar(arrays, csv_path):
+    _save_arrays(sidecar_path(csv_path), arrays, __source__=_source_signature(csv_path))
+
+
+def _read_sidecar(csv_path, usecols=None):
+    path = sidecar_path(csv_path)
+    if not os.path.exists(path):
+        return None
+    with np.load(path, allow_pickle=False) as npz:
+        if "__source__" not in npz.files \
+                or not np.array_equal(npz["__source__"], _source_signature(csv_path)):
+            return None
+        arrays = _load_arrays(npz)
+    if arrays is None:
+        return None
+    if usecols is not None:
+        if any(c not in arrays for c in usecols):
+            return None
+        arrays = {c: arrays[c] for c in usecols}
+    return pd.DataFrame(arrays)
+
+
+def write_table(df, csv_path):
+    """Write `df` to `csv_path` plus its binary sidecar."""
+    df.to_csv(csv_path, index=False)
+    _write_sidecar(_column_arrays(df), csv_path)
+
+
+def write_binary_table(df, path):
+    """
+    Store `df` as a standalone binary table at `path` (an .npz with no CSV
+    behind it), for caches that never need a text copy.
+    """
+    _save_arrays(str(path), _column_arrays(df))
+
+
+def read_binary_table(path):
+    """Table written by write_binary_table, or None when it is missing or fails its hash."""
+    if not os.path.exists(path):
+        return None
+    with np.load(path, allow_pickle=False) as npz:
+        arrays = _load_arrays(npz)
+    return None if arrays is None else pd.DataFrame(arrays)
+
+
+def read_table(csv_path, parse_dates=("Timestamp",), usecols=None, **read_csv_kwargs):
+    """
+    Read a pipeline table, preferring a fresh binary sidecar over the CSV.
+    On a CSV parse the sidecar is (re)written so the next read is binary.
+    Extra read_csv keyword arguments bypass the sidecar in both directions.
+    """
+    if not read_csv_kwargs:
+        df = _read_sidecar(csv_path, usecols)
+        if df is not None:
+            return df
+
+    df = pd.read_csv(csv_path, **read_csv_kwargs)
+    for col in parse_dates or ():
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col])
+    if not read_csv_kwargs:
+        try:
+            _write_sidecar(_column_arrays(df), csv_path)
+        except OSError as e:
+            # e.g. a read-only data directory: the parsed frame is still good
+            print(f"Could not write the sidecar for {csv_path}: {e}")
+    if usecols is not None:
+        df = df[list(usecols)]
+    return df
+
+
+def table_hash(csv_path):
+    """Content hash of the table behind `csv_path` (builds the sidecar if needed)."""
+    df = read_table(csv_path)
+    if _read_sidecar(csv_path) is None:
+        return content_hash(_column_arrays(df))
+    with np.load(sidecar_path(csv_path), allow_pickle=False) as npz:
+        return str(npz["__hash__"])
@@ -0,0 +1,96 @@
+"""
+Typed, schema-validated reads of the pipeline's time-series CSVs.
+
+read_typed projects a CSV down to its timestamp plus the columns named in
+a schema, parses timestamps with one fixed format and values as float64,
+and checks the result is sorted and free of duplicate timestamps. Series
+read this way can be combined with join_sorted, a searchsorted join that
+relies on that ordering instead of hashing timestamps.
+"""
+
+import csv
+import os
+
+import numpy as np
+import pandas as pd
+
+from .columnar import _read_sidecar
+
+TIMESTAMP_COLUMN = "Timestamp"
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class SchemaError(ValueError):
+    """A CSV does not match the schema it is read with."""
+
+
+def _read_header(csv_path):
+    with open(csv_path, newline='') as f:
+        return next(csv.reader(f), [])
+
+
+def resolve_columns(header, schema):
+    """
+    Map each schema name to the first header column containing one of its
+    aliases (schema values are an alias or a tuple of aliases).
+    """
+    resolved = {}
+    for name, aliases in schema.items():
+        aliases = (aliases,) if isinstance(aliases, str) else tuple(aliases)
+        col = next((c for a in aliases for c in header if a in c), None)
+        if col is None:
+            raise SchemaError(f"no column matching {aliases} for {name}; columns: {header}")
+        resolved[name] = col
+    return resolved
+
+
+def read_typed(csv_path, schema, timestamp_format=TIMESTAMP_FORMAT):
+    """
+    DataFrame with TIMESTAMP_COLUMN (datetime64) plus one float64 column per
+    schema name, sorted by time. The source column picked for each name is
+    kept in df.attrs["source_columns"]. Raises SchemaError on missing
+    columns, unparseable values or duplicate timestamps.
+    """
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(csv_path)
+    header = _read_header(csv_path)
+    if TIMESTAMP_COLUMN not in header:
+        raise SchemaError(f"{csv_path}: missing {TIMESTAMP_COLUMN} column")
+    resolved = resolve_columns(header, schema)
+    usecols = [TIMESTAMP_COLUMN] + list(resolved.values())
+
+    df = _read_sidecar(csv_path, usecols)
+    if df is None:
+        try:
+            df = pd.read_csv(csv_path, usecols=usecols,
+                             dtype={c: np.float64 for c in resolved.values()})
+            df[TIMESTAMP_COLUMN] = pd.to_datetime(df[TIMESTAMP_COLUMN], format=timestamp_format)
+        except ValueError as e:
+            raise SchemaError(f"{csv_path}: {e}") from e
+    df = df.astype({c: np.float64 for c in resolved.values()})
+    df = df.rename(columns={col: name for name, col in resolved.items()})[[TIMESTAMP_COLUMN] + list(resolved)]
+
+    ts = df[TIMESTAMP_COLUMN].to_numpy()
+    if len(ts) > 1 and not (ts[1:] >= ts[:-1]).all():
+        df = df.sort_values(TIMESTAMP_COLUMN, kind="stable", ignore_index=True)
+        ts = df[TIMESTAMP_COLUMN].to_numpy()
+    if len(ts) > 1 and (ts[1:] == ts[:-1]).any():
+        raise SchemaError(f"{csv_path}: duplicate timestamps")
+    df.attrs["source_columns"] = resolved
+    return df
+
+
+def join_sorted(left_ts, right_ts, right_values, fill=np.nan):
+    """
+    Left join of one sorted, unique-keyed series onto sorted timestamps:
+    right_values at each left timestamp, `fill` where right has no row.
+    """
+    left_ts = np.asarray(left_ts)
+    out = np.full(len(left_ts), fill, dtype=float)
+    if len(right_ts) == 0:
+        return out
+    right_ts = np.asarray(right_ts).astype(left_ts.dtype)
+    idx = np.minimum(np.searchsorted(right_ts, left_ts), len(right_ts) - 1)
+    hit = right_ts[idx] == left_ts
+    out[hit] = np.asarray(right_values, dtype=float)[idx[hit]]
+    return out
@@ -0,0 +1,106 @@
+"""
+Source-agnostic power balance for the hybrid plant.
+
+balance_arrays takes the HPC load and any number of generation series
+(wind, solar, hydro, gas, ...) as arrays and returns Renewable_MW,
+Excess_MW, Deficit_MW and Grid_Supply_MW in one vectorized pass. Sources
+can be given as a {name: array} mapping or as one stacked array with the
+sources on axis -2, so a (portfolios, farms, intervals) block balances
+every portfolio at once. Optional grid import/export limits (scalars or
+per-interval series) split the deficit into grid supply and unserved load
+and the excess into export and curtailment. load_and_merge reads the load and any number of
+generation CSVs through the typed reader and joins them on the load's
+timestamps.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from data_store import read_typed, join_sorted
+
+BALANCE_COLUMNS = ("Renewable_MW", "Excess_MW", "Deficit_MW", "Grid_Supply_MW",
+                   "Unserved_MW", "Export_MW", "Curtailed_MW")
+LOAD_SCHEMA = {"Load_kW": "Load_kW"}
+GRID_CAPABILITY_MW = 100.0
+
+
+def load_and_merge(load_f, sources):
+    """
+    Load profile plus one column per source, left-joined on the load's
+    timestamps (NaN where a source has no row). `sources` maps the output
+    column to (csv path, column alias or tuple of aliases).
+    """
+    df = read_typed(load_f, LOAD_SCHEMA)
+    ts = df["Timestamp"].to_numpy()
+    for column, (path, aliases) in sources.items():
+        src = read_typed(path, {column: aliases})
+        print(f"Detected {column} column: {src.attrs['source_columns'][column]}")
+        df[column] = join_sorted(ts, src["Timestamp"].to_numpy(), src[column].to_numpy())
+    return df
+
+
+def add_grid_profile(df, import_mw=GRID_CAPABILITY_MW, export_mw=None):
+    """
+    Grid_Capability_MW (import) and Grid_Export_Limit_MW columns, each a
+    scalar or a per-interval series; export defaults to the import limit.
+    """
+    df["Grid_Capability_MW"] = import_mw
+    df["Grid_Export_Limit_MW"] = df["Grid_Capability_MW"] if export_mw is None else export_mw
+    return df
+
+
+def stack_sources(sources):
+    """(k, n) float array from a {name: array} mapping; arrays pass through unchanged."""
+    if isinstance(sources, dict):
+        return np.stack([np.asarray(v, dtype=float) for v in sources.values()])
+    return np.asarray(sources, dtype=float)
+
+
+def balance_arrays(load_mw, sources, import_limit=None, export_limit=None):
+    """
+    load_mw: float[..., n]; sources: {name: float[..., n]} or float[..., k, n];
+    import_limit, export_limit: MW, scalar or broadcastable to [..., n]
+    (None = unlimited). Returns {column: float[..., n]} for BALANCE_COLUMNS.
+    """
+    load = np.asarray(load_mw, dtype=float)
+    renewable = stack_sources(sources).sum(axis=-2)
+    net = renewable - load
+    excess = np.maximum(net, 0.0)
+    deficit = np.maximum(-net, 0.0)
+    grid = deficit if import_limit is None else np.minimum(deficit, np.asarray(import_limit, dtype=float))
+    export = excess if export_limit is None else np.minimum(excess, np.asarray(export_limit, dtype=float))
+    return {
+        "Renewable_MW": renewable,
+        "Excess_MW": excess,
+        "Deficit_MW": deficit,
+        "Grid_Supply_MW": grid,
+        "Unserved_MW": deficit - grid,
+        "Export_MW": export,
+        "Curtailed_MW": excess - export,
+    }
+
+
+def balance_frame(df, source_columns, load_column="Load_MW", import_limit=None, export_limit=None):
+    """
+    Balance `df` over its `source_columns` (MW) and append BALANCE_COLUMNS in
+    one concat. Limits are column names of `df`, scalars or arrays.
+    """
+    limits = [df[lim].to_numpy(dtype=float) if isinstance(lim, str) else lim
+              for lim in (import_limit, export_limit)]
+    out = balance_arrays(df[load_column].to_numpy(dtype=float),
+                         {c: df[c].to_numpy(dtype=float) for c in source_columns}, *limits)
+    return pd.concat([df, pd.DataFrame(out, index=df.index)], axis=1)
+
+
+def energy_mwh(df, column):
+    """Energy of a MW column over the frame, using each row's interval length."""
+    ts = df["Timestamp"].to_numpy()
+    if len(ts) < 2:
+        return 0.0
+    dt_h = np.diff(ts) / np.timedelta64(1, "h")
+    hours = np.append(dt_h, np.median(dt_h))
+    return float(np.nansum(df[column].to_numpy(dtype=float) * hours))
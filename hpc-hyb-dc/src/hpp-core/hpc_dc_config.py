@@ -14,6 +14,13 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import math
+import hashlib
+import os
+import sys
+from functools import lru_cache
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from data_store import write_table, write_binary_table, read_binary_table
 
 # ---------------------------------------------------------------------------
 # 1.  INITIALIZATIONS (unchanged)
@@ -61,36 +68,64 @@ def prompt_dc_size():
 # ---------------------------------------------------------------------------
 # 3.  COMPUTE LOAD PROFILE
 # ---------------------------------------------------------------------------
-def build_load_profile(dc_size_mw):
+def profile_params(**overrides):
+    """Current values of every constant the profile depends on, plus overrides."""
+    params = {
+        'rack_power_kw': RACK_POWER_KW,
+        'node_density': tuple(sorted(NODE_DENSITY.items())),
+        'gpu_ratio': GPU_RATIO,
+        'cpu_ratio': CPU_RATIO,
+        'asic_ratio': ASIC_RATIO,
+        'gpu_power_w': GPU_POWER_W,
+        'cpu_power_w': CPU_POWER_W,
+        'asic_power_w': ASIC_POWER_W,
+        'storage_w': STORAGE_W,
+        'network_w': NETWORK_W,
+        'design_pue': DESIGN_PUE,
+        'utilization': UTILIZATION,
+        'interval_min': INTERVAL_MIN,
+    }
+    unknown = set(overrides) - set(params)
+    if unknown:
+        raise ValueError(f"Unknown profile parameters: {sorted(unknown)}")
+    params.update(overrides)
+    return params
+
+def build_load_profile(dc_size_mw, params=None, start=None):
     """
-    Generate a 24h load profile at 5-minute steps for given DC size.
+    Generate a 24h load profile for given DC size.
+    `params` (see profile_params) defaults to the module constants and
+    `start` to today's midnight.
     Returns a DataFrame with timestamp and total load (kW).
     """
+    p = params or profile_params()
+    density = dict(p['node_density'])
     # Compute racks and nodes
-    num_racks = int((dc_size_mw * 1000) / RACK_POWER_KW)
+    num_racks = int((dc_size_mw * 1000) / p['rack_power_kw'])
     if dc_size_mw <= 2:
-        nodes_per_rack = NODE_DENSITY['small']
+        nodes_per_rack = density['small']
     elif dc_size_mw <= 5:
-        nodes_per_rack = NODE_DENSITY['medium']
+        nodes_per_rack = density['medium']
     else:
-        nodes_per_rack = NODE_DENSITY['large']
+        nodes_per_rack = density['large']
     total_nodes = num_racks * nodes_per_rack
 
     # Per-node peak load (W)
     peak_node_w = (
-        GPU_RATIO * GPU_POWER_W +
-        CPU_RATIO * CPU_POWER_W +
-        ASIC_RATIO * ASIC_POWER_W +
-        STORAGE_W +
-        NETWORK_W
+        p['gpu_ratio'] * p['gpu_power_w'] +
+        p['cpu_ratio'] * p['cpu_power_w'] +
+        p['asic_ratio'] * p['asic_power_w'] +
+        p['storage_w'] +
+        p['network_w']
     )
     # Convert to kW and apply utilization & PUE
     peak_node_kw = peak_node_w / 1000.0
-    effective_peak_kw = peak_node_kw * UTILIZATION * DESIGN_PUE
+    effective_peak_kw = peak_node_kw * p['utilization'] * p['design_pue']
 
     # Build timestamps
-    start = datetime.combine(datetime.today(), datetime.min.time())
-    timestamps = [start + timedelta(minutes=i * INTERVAL_MIN) for i in range(int(24*60/INTERVAL_MIN))]
+    start = start or datetime.combine(datetime.today(), datetime.min.time())
+    interval_min = p['interval_min']
+    timestamps = [start + timedelta(minutes=i * interval_min) for i in range(int(24*60/interval_min))]
 
     # Generate diurnal shape (e.g., higher daytime load, lower at night)
     hours = np.array([t.hour + t.minute/60 for t in timestamps])
@@ -108,6 +143,79 @@ def build_load_profile(dc_size_mw):
     })
     return df
 
+# ---------------------------------------------------------------------------
+# 3b. PROFILE CACHE (LRU in memory, .npz on disk)
+# ---------------------------------------------------------------------------
+# Disk tier lives in the user's cache directory (HPC_DC_PROFILE_CACHE overrides it)
+PROFILE_CACHE_DIR = os.environ.get('HPC_DC_PROFILE_CACHE') or os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'hpc_dc', 'profile_cache')
+_invalidation_hooks = []
+_last_constants = None
+
+def on_profile_cache_invalidated(hook):
+    """Register hook(old_params, new_params), called when a module constant changes.
+    Usable as a decorator."""
+    _invalidation_hooks.append(hook)
+    return hook
+
+def invalidate_profile_cache(clear_disk=False):
+    _profile_values.cache_clear()
+    if clear_disk and os.path.isdir(PROFILE_CACHE_DIR):
+        for name in os.listdir(PROFILE_CACHE_DIR):
+            os.remove(os.path.join(PROFILE_CACHE_DIR, name))
+
+def _check_constants():
+    """Drop the memory tier and fire hooks if any module constant changed since the last call."""
+    global _last_constants
+    current = profile_params()
+    if _last_constants is not None and current != _last_constants:
+        old = _last_constants
+        _last_constants = current
+        invalidate_profile_cache()
+        for hook in _invalidation_hooks:
+            hook(old, current)
+    _last_constants = current
+
+def _profile_key(dc_size_mw, params, start_minute=0):
+    return (float(dc_size_mw), int(start_minute)) + tuple(sorted(params.items()))
+
+@lru_cache(maxsize=128)
+def _profile_values(key):
+    dc_size_mw, start_minute, params = key[0], key[1], dict(key[2:])
+    digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+    path = os.path.join(PROFILE_CACHE_DIR, f"load_{digest}.npz")
+    cached = read_binary_table(path)
+    if cached is not None:
+        values = cached['Load_kW'].to_numpy()
+    else:
+        start = datetime.combine(datetime.today(), datetime.min.time()) + timedelta(minutes=start_minute)
+        df = build_load_profile(dc_size_mw, params, start)
+        values = df['Load_kW'].to_numpy()
+        try:
+            os.makedirs(PROFILE_CACHE_DIR, exist_ok=True)
+            write_binary_table(df[['Load_kW']], path)
+        except OSError as e:
+            # an unwritable cache directory only costs the disk tier
+            print(f"Could not cache the load profile in {PROFILE_CACHE_DIR}: {e}")
+    values.flags.writeable = False
+    return values
+
+def cached_load_profile(dc_size_mw, start=None, **overrides):
+    """
+    Memoized build_load_profile. Profiles are keyed on the DC size, the time
+    of day of `start` (which sets the diurnal shape) and every profile
+    parameter (module constants or `overrides`); the date only moves the
+    timestamps.
+    """
+    _check_constants()
+    params = profile_params(**overrides)
+    start = start or datetime.combine(datetime.today(), datetime.min.time())
+    start_minute = pd.Timestamp(start).hour * 60 + pd.Timestamp(start).minute
+    values = _profile_values(_profile_key(dc_size_mw, params, start_minute))
+    timestamps = pd.date_range(start, periods=len(values), freq=f"{params['interval_min']}min")
+    return pd.DataFrame({'Timestamp': timestamps, 'Load_kW': values})
+
 # ---------------------------------------------------------------------------
 # 4.  MAIN
 # ---------------------------------------------------------------------------
@@ -117,7 +225,7 @@ def main():
     print(f"\nGenerating 24h load profile for {dc_size:.1f} MW DC...")
     profile_df = build_load_profile(dc_size)
     filename = f"dc_{int(dc_size)}MW_load_profile.csv"
-    profile_df.to_csv(filename, index=False)
+    write_table(profile_df, filename)
     print(f"Load profile saved to {filename}")
 
 if __name__ == "__main__":
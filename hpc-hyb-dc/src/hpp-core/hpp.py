@@ -1,134 +1,62 @@
-import csv
-import pandas as pd
-import matplotlib.pyplot as plt
+import argparse
+import os
+import sys
+from functools import partial
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from data_store import write_table
+import balance_core
+from balance_core import add_grid_profile, energy_mwh
+import hpp_plots
 
 # File paths (update as needed)
 WIND_FILE  = "/Users/rakshit9695/Desktop/Final_Implementation/Final_Implementation/hpc-hyb-dc/src/hpp-core/csv_files/wind_farm_hpc_max_output.csv"
 SOLAR_FILE = "/Users/rakshit9695/Desktop/Final_Implementation/Final_Implementation/hpc-hyb-dc/src/hpp-core/csv_files/solar_out.csv"
 LOAD_FILE  = "/Users/rakshit9695/Desktop/Final_Implementation/Final_Implementation/hpc-hyb-dc/src/hpp-core/csv_files/dc_10MW_load_profile.csv"
 
-def load_csv_with_csv_module(file_path):
-    """Load CSV file using csv.reader and return as list of dicts."""
-    with open(file_path, 'r', newline='') as f:
-        reader = csv.DictReader(f)
-        data = [row for row in reader]
-    return data
+# Generation columns (MW) summed by the balance, in stacking order
+SOURCES = ["Wind_MW", "Solar_MW"]
 
 def load_and_merge(wind_f, solar_f, load_f):
-    # Load wind and solar using pandas for flexible column detection
-    df_w = pd.read_csv(wind_f, parse_dates=["Timestamp"])
-    df_s = pd.read_csv(solar_f, parse_dates=["Timestamp"])
-    # Load load profile using csv module, then convert to DataFrame
-    load_data = load_csv_with_csv_module(load_f)
-    df_l = pd.DataFrame(load_data)
-    df_l["Timestamp"] = pd.to_datetime(df_l["Timestamp"])
-    df_l["Load_kW"] = pd.to_numeric(df_l["Load_kW"], errors="coerce")
-
-    # Detect columns
-    wind_col = next((col for col in df_w.columns if "HPC_Max_MW" in col), None)
-    solar_col = next((col for col in df_s.columns if "AC_kW" in col), None)
-
-    if wind_col is None or solar_col is None:
-        raise ValueError(f"Could not find wind or solar power columns. Wind columns: {df_w.columns}, Solar columns: {df_s.columns}")
-
-    print(f"Detected wind column: {wind_col}")
-    print(f"Detected solar column: {solar_col}")
-
-    # Rename for consistency
-    df_w = df_w.rename(columns={wind_col: "Wind_MW"})
-    df_s = df_s.rename(columns={solar_col: "Solar_kW"})
-
-    # Merge with left join to preserve all timestamps
-    df = df_l.merge(df_w[["Timestamp", "Wind_MW"]], on="Timestamp", how="left")
-    df = df.merge(df_s[["Timestamp", "Solar_kW"]], on="Timestamp", how="left")
-    return df
-
-
-
-def add_grid_profile(df):
-    df["Grid_Capability_MW"] = 100.0
-    return df
+    # One typed reader for all three inputs, joined on the load's timestamps
+    return balance_core.load_and_merge(load_f, {
+        "Wind_MW": (wind_f, "HPC_Max_MW"),
+        "Solar_kW": (solar_f, "AC_kW"),
+    })
 
 def balance(df):
     df["Solar_MW"] = df["Solar_kW"] / 1000.0
-    df["Renewable_MW"] = df["Wind_MW"] + df["Solar_MW"]
     df["Load_MW"] = df["Load_kW"] / 1000.0
-    df["Excess_MW"] = (df["Renewable_MW"] - df["Load_MW"]).clip(lower=0)
-    df["Deficit_MW"] = (df["Load_MW"] - df["Renewable_MW"]).clip(lower=0)
-    df["Grid_Supply_MW"] = df["Deficit_MW"]
-    return df
-
-def plot_load_vs_supply(df):
-    ts = df["Timestamp"]
-    plt.figure(figsize=(12,5))
-    plt.plot(ts, df["Load_MW"], label="HPC Load", color="black", linewidth=1.5)
-    plt.fill_between(ts, df["Wind_MW"], label="Wind", color="skyblue", alpha=0.6)
-    plt.fill_between(ts,
-                     df["Wind_MW"],
-                     df["Wind_MW"] + df["Solar_MW"],
-                     label="Solar", color="gold", alpha=0.6)
-    plt.fill_between(ts,
-                     df["Wind_MW"] + df["Solar_MW"],
-                     df["Wind_MW"] + df["Solar_MW"] + df["Grid_Supply_MW"],
-                     label="Grid", color="lightcoral", alpha=0.6)
-    plt.legend(loc="upper left")
-    plt.title("Load vs Supply Breakdown")
-    plt.ylabel("Power (MW)")
-    plt.xlabel("Timestamp")
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig("plot_load_vs_supply.png")
-    plt.close()
-
-def plot_wind_solar(df):
-    ts = df["Timestamp"]
-    plt.figure(figsize=(12,4))
-    plt.plot(ts, df["Wind_MW"],  label="Wind",  color="blue", linewidth=1)
-    plt.plot(ts, df["Solar_MW"], label="Solar", color="orange", linewidth=1)
-    plt.legend()
-    plt.title("Wind & Solar Output")
-    plt.ylabel("Power (MW)")
-    plt.xlabel("Timestamp")
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig("plot_wind_solar.png")
-    plt.close()
-
-def plot_excess(df):
-    ts = df["Timestamp"]
-    plt.figure(figsize=(12,4))
-    plt.plot(ts, df["Excess_MW"], color="green", linewidth=1)
-    plt.title("Excess Renewable Power")
-    plt.ylabel("Power (MW)")
-    plt.xlabel("Timestamp")
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig("plot_excess.png")
-    plt.close()
-
-def plot_grid_dependency(df):
-    ts = df["Timestamp"]
-    plt.figure(figsize=(12,4))
-    plt.plot(ts, df["Grid_Supply_MW"], color="red", linewidth=1)
-    plt.title("Grid Supply Requirement")
-    plt.ylabel("Power (MW)")
-    plt.xlabel("Timestamp")
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig("plot_grid_dependency.png")
-    plt.close()
-
-def main():
+    return balance_core.balance_frame(df, SOURCES, import_limit="Grid_Capability_MW",
+                                      export_limit="Grid_Export_Limit_MW")
+
+def plot_jobs():
+    return [
+        partial(hpp_plots.plot_load_vs_supply, sources=SOURCES),
+        partial(hpp_plots.plot_sources, sources=SOURCES, title="Wind & Solar Output",
+                filename="plot_wind_solar.png"),
+        hpp_plots.plot_excess,
+        hpp_plots.plot_grid_dependency,
+    ]
+
+def main(plots=True, plot_workers=1):
+    """plots=False skips the figures; plot_workers > 1 (or None for one per CPU) draws them in a process pool."""
     df = load_and_merge(WIND_FILE, SOLAR_FILE, LOAD_FILE)
     df = add_grid_profile(df)
     df = balance(df)
-    df.to_csv("balanced_output.csv", index=False)
+    write_table(df, "balanced_output.csv")
     print("Balanced output saved to balanced_output.csv")
-    plot_load_vs_supply(df)
-    plot_wind_solar(df)
-    plot_excess(df)
-    plot_grid_dependency(df)
-    print("Plots saved as PNG files.")
+    print(f"Unserved load: {energy_mwh(df, 'Unserved_MW'):.1f} MWh | "
+          f"Export: {energy_mwh(df, 'Export_MW'):.1f} MWh | "
+          f"Curtailed: {energy_mwh(df, 'Curtailed_MW'):.1f} MWh")
+    if plots:
+        hpp_plots.render_plots(df, plot_jobs(), workers=plot_workers)
+        print("Plots saved as PNG files.")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Balance wind and solar output against the HPC load")
+    parser.add_argument("--no-plots", action="store_true", help="skip the PNG figures (numbers only)")
+    parser.add_argument("--plot-workers", type=int, default=1,
+                        help="processes for rendering figures (default 1 = in-process)")
+    args = parser.parse_args()
+    main(plots=not args.no_plots, plot_workers=args.plot_workers)
@@ -0,0 +1,88 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import matplotlib
+import matplotlib.pyplot as plt
+
+# Colours per source column; sources not listed use the matplotlib cycle
+STACK_COLORS = {"Wind_MW": "skyblue", "Solar_MW": "gold", "Grid_Supply_MW": "lightcoral",
+                "Unserved_MW": "dimgray"}
+LINE_COLORS = {"Wind_MW": "blue", "Solar_MW": "orange"}
+
+
+def _label(column):
+    return {"Grid_Supply_MW": "Grid", "Unserved_MW": "Unserved"}.get(column, column.replace("_MW", ""))
+
+
+def _finish(title, filename):
+    plt.title(title)
+    plt.ylabel("Power (MW)")
+    plt.xlabel("Timestamp")
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+    plt.savefig(filename)
+    plt.close()
+
+
+def plot_load_vs_supply(df, sources, title="Load vs Supply Breakdown",
+                        filename="plot_load_vs_supply.png"):
+    """Load line over the stacked sources, topped up by grid supply and any unserved load."""
+    ts = df["Timestamp"]
+    plt.figure(figsize=(12,5))
+    plt.plot(ts, df["Load_MW"], label="HPC Load", color="black", linewidth=1.5)
+    base = np.zeros(len(df))
+    stack = list(sources) + ["Grid_Supply_MW"]
+    if "Unserved_MW" in df and (df["Unserved_MW"] > 0).any():
+        stack.append("Unserved_MW")
+    for col in stack:
+        top = base + df[col].to_numpy()
+        plt.fill_between(ts, base, top, label=_label(col), color=STACK_COLORS.get(col), alpha=0.6)
+        base = top
+    plt.legend(loc="upper left")
+    _finish(title, filename)
+
+
+def plot_sources(df, sources, title, filename):
+    ts = df["Timestamp"]
+    plt.figure(figsize=(12,4))
+    for col in sources:
+        plt.plot(ts, df[col], label=_label(col), color=LINE_COLORS.get(col), linewidth=1)
+    plt.legend()
+    _finish(title, filename)
+
+
+def plot_excess(df, title="Excess Renewable Power", filename="plot_excess.png"):
+    plt.figure(figsize=(12,4))
+    plt.plot(df["Timestamp"], df["Excess_MW"], color="green", linewidth=1)
+    _finish(title, filename)
+
+
+def plot_grid_dependency(df, filename="plot_grid_dependency.png"):
+    plt.figure(figsize=(12,4))
+    plt.plot(df["Timestamp"], df["Grid_Supply_MW"], color="red", linewidth=1)
+    _finish("Grid Supply Requirement", filename)
+
+
+def _use_agg():
+    matplotlib.use("Agg")
+
+
+def _render(job, df):
+    job(df)
+    return getattr(job, "func", job).__name__
+
+
+def render_plots(df, jobs, workers=None):
+    """
+    Call every job(df) (plot functions, usually functools.partial with their
+    options bound). workers=1 renders in this process; otherwise figures
+    are drawn in parallel by a process pool on the Agg backend.
+    """
+    if workers == 1:
+        for job in jobs:
+            job(df)
+        return
+    with ProcessPoolExecutor(max_workers=workers or min(len(jobs), os.cpu_count() or 1),
+                             initializer=_use_agg) as pool:
+        list(pool.map(_render, jobs, [df] * len(jobs)))
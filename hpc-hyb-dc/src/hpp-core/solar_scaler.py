@@ -1,34 +1,109 @@
+import argparse
+import json
+from functools import lru_cache
+
 import numpy as np
-import pandas as pd
 import os
 
 # Import solar project config from solar_in.py
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '../renewable_intake'))
-from solar_in import PROJECT_CONFIG
+from solar_in import PROJECT_CONFIG, simulate_array
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from data_store import read_table
+
+DEFAULT_TARGET_FRACTION = 0.8   # share of load energy served directly by renewables
+TOLERANCE_MW = 0.01
+
+
+@lru_cache(maxsize=8)
+def _per_mw_profile(start_ns, periods, step_ns, config_json):
+    cfg = json.loads(config_json)
+    ts = np.datetime64(start_ns, "ns") + np.arange(periods) * np.timedelta64(step_ns, "ns")
+    per_mw = simulate_array(ts, cfg)["AC_kW"] / 1000.0 / cfg["rated_power_ac"]
+    per_mw.flags.writeable = False
+    return per_mw
 
-def get_required_solar_ac_rating(grid_supply_mw_series, solar_config):
+
+def solar_profile_per_mw(timestamps, solar_config=PROJECT_CONFIG):
     """
-    Given a series of required grid supply (MW), and the solar config dict,
-    return the minimum AC rating of the solar farm needed to meet the max grid supply.
+    AC output (MW) per MWac of installed solar at each timestamp. Scaling
+    modules and inverters together keeps the model linear in plant size,
+    so one run serves every candidate rating; runs on a regular time grid
+    are cached per (horizon, config).
     """
-    required_ac_rating = grid_supply_mw_series.max()
-    return required_ac_rating
+    ts = np.asarray(timestamps, dtype="datetime64[ns]")
+    step = np.diff(ts)
+    if len(ts) < 2 or (step != step[0]).any():
+        return simulate_array(ts, solar_config)["AC_kW"] / 1000.0 / solar_config["rated_power_ac"]
+    return _per_mw_profile(int(ts[0].astype(np.int64)), len(ts), int(step[0].astype(np.int64)),
+                           json.dumps(solar_config, sort_keys=True))
+
+
+def renewable_fraction(load_mw, other_mw, solar_per_mw, ac_rating_mw):
+    """Share of load energy covered directly by `other_mw` plus solar of `ac_rating_mw`."""
+    total = load_mw.sum()
+    if total <= 0:
+        raise ValueError("renewable fraction is undefined without load energy")
+    served = np.minimum(load_mw, other_mw + solar_per_mw * ac_rating_mw)
+    return served.sum() / total
+
+
+def get_required_solar_ac_rating(balanced_df, solar_config=PROJECT_CONFIG,
+                                 target_fraction=DEFAULT_TARGET_FRACTION, tol_mw=TOLERANCE_MW):
+    """
+    Smallest solar AC rating (MWac) at which wind (the non-solar part of
+    Renewable_MW) plus solar covers `target_fraction` of the load energy in
+    `balanced_df`, found by bisection over the cached per-MW solar profile.
+    Returns (rating, fraction at that rating); rating is None when the
+    target is out of reach with solar alone (e.g. too much night-time load).
+    """
+    load = balanced_df["Load_MW"].to_numpy(dtype=float)
+    if load.sum() <= 0:
+        raise ValueError("balanced_df has no load energy to size the solar farm for")
+    other = balanced_df["Renewable_MW"].to_numpy(dtype=float) if "Renewable_MW" in balanced_df \
+        else balanced_df["Wind_MW"].to_numpy(dtype=float)
+    if "Solar_MW" in balanced_df:
+        other = other - balanced_df["Solar_MW"].to_numpy(dtype=float)
+    other = np.nan_to_num(other)
+    per_mw = solar_profile_per_mw(balanced_df["Timestamp"].to_numpy(), solar_config)
+
+    if renewable_fraction(load, other, per_mw, 0.0) >= target_fraction:
+        return 0.0, renewable_fraction(load, other, per_mw, 0.0)
+    # with unlimited solar every daylight interval is covered
+    ceiling = np.where(per_mw > 0, load, np.minimum(load, other)).sum() / load.sum()
+    if ceiling < target_fraction:
+        return None, ceiling
+
+    lo, hi = 0.0, max(load.max() / max(per_mw.max(), 1e-9), tol_mw)
+    while renewable_fraction(load, other, per_mw, hi) < target_fraction:
+        lo, hi = hi, hi * 2
+    while hi - lo > tol_mw:
+        mid = (lo + hi) / 2
+        if renewable_fraction(load, other, per_mw, mid) >= target_fraction:
+            hi = mid
+        else:
+            lo = mid
+    return hi, renewable_fraction(load, other, per_mw, hi)
 
 
-def main():
+def main(target_fraction=DEFAULT_TARGET_FRACTION):
     # Fix the path to balanced_output.csv relative to this script
     script_dir = os.path.dirname(os.path.abspath(__file__))
     csv_path = os.path.abspath(os.path.join(script_dir, '../../../../balanced_output.csv'))
-    df = pd.read_csv(csv_path)
-    grid_supply_mw = df['Grid_Supply_MW']
+    df = read_table(csv_path)
 
     # Get the solar farm config (from solar_in.py)
     solar_config = PROJECT_CONFIG
 
     # Calculate the required AC rating
-    required_ac_rating = get_required_solar_ac_rating(grid_supply_mw, solar_config)
-    print(f"Required solar farm AC rating to meet grid supply: {required_ac_rating:.2f} MWac")
+    required_ac_rating, fraction = get_required_solar_ac_rating(df, solar_config, target_fraction)
+    if required_ac_rating is None:
+        print(f"A {target_fraction:.0%} renewable fraction is out of reach with solar; "
+              f"the most solar can reach is {fraction:.1%}")
+        return
+    print(f"Required solar farm AC rating for {target_fraction:.0%} renewable fraction: "
+          f"{required_ac_rating:.2f} MWac ({fraction:.1%})")
     print(f"Current solar farm AC rating: {solar_config['rated_power_ac']} MWac")
     if required_ac_rating > solar_config['rated_power_ac']:
         print(f"Increase solar farm size by {required_ac_rating - solar_config['rated_power_ac']:.2f} MWac")
@@ -36,4 +111,7 @@ def main():
         print("Current solar farm is sufficient.")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Size the solar farm for a target renewable fraction")
+    parser.add_argument("--target", type=float, default=DEFAULT_TARGET_FRACTION,
+                        help="share of load energy to serve from renewables (0-1)")
+    main(parser.parse_args().target)
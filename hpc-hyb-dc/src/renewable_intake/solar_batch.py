@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Multi-Site / Multi-Year Solar-PV Batch Simulator
+
+• Takes a list of site configs shaped like solar_in.PROJECT_CONFIG and a date range
+• Shards sites × days across a process pool (array engine per shard)
+• Streams shard results into one columnar file (Parquet if pyarrow is present, else CSV)
+  without holding every site's DataFrame in memory
+"""
+
+from collections import Counter, deque
+from datetime import date, datetime, timedelta
+from multiprocessing import Pool
+import argparse
+import json
+import os
+import pathlib
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from solar_in import PROJECT_CONFIG, simulate_array
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:          # optional: fall back to CSV output
+    pa = pq = None
+
+OUTPUT_COLUMNS = ["Site", "Timestamp", "AC_kW", "DC_kW",
+                  "POA_Irradiance_Wm2", "Module_Temp_C"]
+
+# Shards submitted to the pool per worker before the oldest result is written
+SHARDS_IN_FLIGHT_PER_WORKER = 2
+
+# ───────────────────────────────────────────────────────────────────────────────
+# 1.  Sharding
+# ───────────────────────────────────────────────────────────────────────────────
+def site_name(cfg, ix):
+    return cfg.get("project_name") or f"site_{ix}"
+
+def site_names(sites):
+    """site_name per site; repeated names get a `#ix` suffix so every site keeps its own rows."""
+    names = [site_name(cfg, ix) for ix, cfg in enumerate(sites)]
+    counts = Counter(names)
+    return [f"{n}#{ix}" if counts[n] > 1 else n for ix, n in enumerate(names)]
+
+def make_shards(sites, start: date, end: date, days_per_shard=31, step_min=5):
+    """Split sites × [start, end) into (site_ix, cfg, shard_start, shard_end, step) tasks."""
+    shards = []
+    for ix, cfg in enumerate(sites):
+        d = start
+        while d < end:
+            d_end = min(d + timedelta(days=days_per_shard), end)
+            shards.append((ix, cfg, d, d_end, step_min))
+            d = d_end
+    return shards
+
+def simulate_shard(shard):
+    """Worker: run the array engine for one site over one block of days."""
+    ix, cfg, d_start, d_end, step_min = shard
+    ts = np.arange(np.datetime64(d_start, "m"), np.datetime64(d_end, "m"),
+                   np.timedelta64(step_min, "m"))
+    cols = simulate_array(ts, cfg)
+    return ix, ts.astype("datetime64[ns]"), cols
+
+# ───────────────────────────────────────────────────────────────────────────────
+# 2.  Columnar sinks (append one shard at a time)
+# ───────────────────────────────────────────────────────────────────────────────
+class ParquetSink:
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        self.schema = pa.schema([
+            ("Site", pa.dictionary(pa.int32(), pa.string())),
+            ("Timestamp", pa.timestamp("ns")),
+            ("AC_kW", pa.float64()),
+            ("DC_kW", pa.float64()),
+            ("POA_Irradiance_Wm2", pa.float64()),
+            ("Module_Temp_C", pa.float64()),
+        ])
+        self.writer = pq.ParquetWriter(self.path, self.schema)
+
+    def write(self, site, ts, cols):
+        n = len(ts)
+        site_col = pa.DictionaryArray.from_arrays(np.zeros(n, dtype=np.int32), [site])
+        arrays = [site_col, pa.array(ts)] + [pa.array(cols[c]) for c in OUTPUT_COLUMNS[2:]]
+        self.writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+class CsvSink:
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        self.header = True
+        self.path.unlink(missing_ok=True)
+
+    def write(self, site, ts, cols):
+        df = pd.DataFrame({"Site": site, "Timestamp": ts, **cols}, columns=OUTPUT_COLUMNS)
+        df.to_csv(self.path, mode="a", header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        pass
+
+def open_sink(path):
+    path = pathlib.Path(path)
+    if path.suffix == ".parquet":
+        if pq is None:
+            raise ImportError("Parquet output needs pyarrow; use a .csv path instead")
+        return ParquetSink(path)
+    return CsvSink(path)
+
+# ───────────────────────────────────────────────────────────────────────────────
+# 3.  Batch API
+# ───────────────────────────────────────────────────────────────────────────────
+def simulate_sites(sites, start: date, end: date, out_path, step_min=5,
+                   workers=None, days_per_shard=31):
+    """
+    Simulate every site over [start, end) and stream rows into `out_path`.
+    Shards are appended in (site, time) order; at most
+    SHARDS_IN_FLIGHT_PER_WORKER shards per worker are held in memory.
+    Returns {site name: AC energy in MWh}.
+    """
+    shards = make_shards(sites, start, end, days_per_shard, step_min)
+    names = site_names(sites)
+    energy_mwh = dict.fromkeys(names, 0.0)
+    sink = open_sink(out_path)
+    try:
+        if workers == 1:
+            results = map(simulate_shard, shards)
+            _drain(results, names, sink, energy_mwh, step_min)
+        else:
+            limit = SHARDS_IN_FLIGHT_PER_WORKER * (workers or os.cpu_count() or 1)
+            with Pool(processes=workers) as pool:
+                results = _bounded_imap(pool, simulate_shard, shards, limit)
+                _drain(results, names, sink, energy_mwh, step_min)
+    finally:
+        sink.close()
+    return energy_mwh
+
+def _bounded_imap(pool, func, tasks, limit):
+    """Ordered pool.imap that never has more than `limit` tasks submitted but not yet consumed."""
+    pending = deque()
+    for task in tasks:
+        if len(pending) >= limit:
+            yield pending.popleft().get()
+        pending.append(pool.apply_async(func, (task,)))
+    while pending:
+        yield pending.popleft().get()
+
+def _drain(results, names, sink, energy_mwh, step_min):
+    for ix, ts, cols in results:
+        sink.write(names[ix], ts, cols)
+        energy_mwh[names[ix]] += cols["AC_kW"].sum() * step_min / 60 / 1000
+
+def load_sites(path):
+    """Read a JSON list of site configs; missing keys fall back to PROJECT_CONFIG."""
+    with open(path) as f:
+        raw = json.load(f)
+    sites = []
+    for entry in raw:
+        cfg = {**PROJECT_CONFIG, **entry}
+        cfg["project_name"] = entry.get("project_name", f"site_{len(sites)}")
+        cfg["location"] = {**PROJECT_CONFIG["location"], **entry.get("location", {})}
+        cfg["pv_modules"] = {**PROJECT_CONFIG["pv_modules"], **entry.get("pv_modules", {})}
+        cfg["inverters"] = {**PROJECT_CONFIG["inverters"], **entry.get("inverters", {})}
+        sites.append(cfg)
+    return sites
+
+# ───────────────────────────────────────────────────────────────────────────────
+# 4.  Main entry point
+# ───────────────────────────────────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description="Batch solar simulation over many sites")
+    parser.add_argument("--sites", help="JSON list of site configs (default: PROJECT_CONFIG)")
+    parser.add_argument("--start", required=True, help="first day, YYYY-MM-DD")
+    parser.add_argument("--end", required=True, help="day after the last, YYYY-MM-DD")
+    parser.add_argument("--out", default="solar_batch.parquet" if pq else "solar_batch.csv")
+    parser.add_argument("--step-min", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    sites = load_sites(args.sites) if args.sites else [PROJECT_CONFIG]
+    start = datetime.strptime(args.start, "%Y-%m-%d").date()
+    end = datetime.strptime(args.end, "%Y-%m-%d").date()
+
+    energy = simulate_sites(sites, start, end, args.out, args.step_min, args.workers)
+    print(f"Simulated {len(sites)} site(s) {start} → {end} → {args.out}")
+    for name, mwh in energy.items():
+        print(f"  {name:30s} {mwh:10.1f} MWh AC")
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ One-Day Solar-PV Simulator (5-min resolution)
 
 • Computes AC & DC power, plane-of-array (POA) irradiance, and module temperature
 • Resolution: 5 minutes
+• Array engine (simulate_range) for multi-day / full-year runs at any step
 • Stores results in solar_out.csv
 • Plots time-series of all parameters
 """
@@ -11,8 +12,14 @@ One-Day Solar-PV Simulator (5-min resolution)
 from datetime import datetime, timedelta, date
 import math
 import pathlib
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from data_store import write_table
 
 # ───────────────────────────────────────────────────────────────────────────────
 # 1.  Project configuration (full dictionary)
@@ -103,9 +110,87 @@ def shading_losses(gcr, elev):
     return (1 - sf) * 100
 
 # ───────────────────────────────────────────────────────────────────────────────
-# 3.  Five-minute simulation for a chosen date
+# 3.  Array engine (NumPy versions of the helpers above, same formulas)
 # ───────────────────────────────────────────────────────────────────────────────
-def simulate_one_day(sim_date: date, step_min=5):
+TRANSFORMER_LINE_FACTOR = 0.985 * (1 - 0.02) * (1 - 0.01)  # transformer & line losses
+INVERTER_LR_EDGES = np.array([0.1, 0.2, 0.5, 0.75, 1.0])
+INVERTER_LR_EFFS = np.array([0.85, 0.92, 0.96, 0.98, 0.989, 0.985])
+
+def solar_position_array(doy, lat, hr):
+    decl = np.radians(23.45 * np.sin(np.radians(360 * (284 + doy) / 365)))
+    ha = np.radians(15 * (hr - 12))
+    lat = math.radians(lat)
+    elev = np.arcsin(np.sin(decl) * math.sin(lat) +
+                     np.cos(decl) * math.cos(lat) * np.cos(ha))
+    azim = np.arctan2(np.sin(ha),
+                      np.cos(ha) * math.sin(lat) - np.tan(decl) * math.cos(lat))
+    return np.degrees(elev), np.degrees(azim)
+
+def poa_irradiance_array(ghi, tilt, surf_az, elev, azim):
+    sin_elev = np.sin(np.radians(elev))
+    cos_i = (sin_elev * math.cos(math.radians(tilt)) +
+             np.cos(np.radians(elev)) * math.sin(math.radians(tilt)) *
+             np.cos(np.radians(azim - surf_az)))
+    dni = ghi * np.maximum(0, cos_i) / np.maximum(0.1, sin_elev)
+    poa = np.maximum(0, dni * cos_i + ghi * 0.1 * (1 + math.cos(math.radians(tilt))) / 2)
+    return np.where(elev > 0, poa, 0.0)
+
+def inverter_eff_array(dc_kw, rated_kw):
+    # bucket i covers (edge[i-1], edge[i]]; side="left" keeps the upper edge inclusive
+    return INVERTER_LR_EFFS[np.searchsorted(INVERTER_LR_EDGES, dc_kw / rated_kw, side="left")]
+
+def shading_losses_array(gcr, elev):
+    sf = np.maximum(0, 1 - (gcr / 100) * (1 / np.tan(np.radians(np.maximum(1, elev)))))
+    return np.where(elev > 0, (1 - sf) * 100, 100.0)
+
+def simulate_array(timestamps, cfg=PROJECT_CONFIG, gcr=52.57):
+    """
+    Run the PV model over a datetime64 array in one pass.
+    Returns a dict of float arrays (AC_kW, DC_kW, POA_Irradiance_Wm2, Module_Temp_C).
+    """
+    ts = np.asarray(timestamps, dtype="datetime64[s]")
+    day = ts.astype("datetime64[D]")
+    doy = (day - day.astype("datetime64[Y]")).astype(np.int64) + 1
+    month_ix = day.astype("datetime64[M]").astype(np.int64) % 12
+    minutes = (ts - day).astype("timedelta64[m]").astype(np.int64)
+    hr = (minutes // 60) + (minutes % 60) / 60
+
+    ghi_day = (np.asarray(cfg["monthly_ghi"]) / np.asarray(DAYS_IN_MONTH))[month_ix]
+    amb = np.asarray(cfg["monthly_temp"])[month_ix]
+
+    elev, azim = solar_position_array(doy, cfg["location"]["latitude"], hr)
+    up = elev > 0
+
+    poa = poa_irradiance_array(ghi_day, cfg["tilt_angle"], cfg["azimuth_angle"], elev, azim)
+    tmod = module_temperature(amb, poa)
+    pmod = module_power(poa, tmod, cfg["pv_modules"]["peak_power"])
+    dc_kw = pmod * cfg["pv_modules"]["quantity"] / 1000
+    dc_kw *= (1 - shading_losses_array(gcr, elev) / 100)
+    ac_kw = dc_kw * inverter_eff_array(dc_kw, cfg["inverters"]["rated_power"])
+    ac_kw *= TRANSFORMER_LINE_FACTOR
+
+    return {
+        "AC_kW": np.where(up, ac_kw, 0.0),
+        "DC_kW": np.where(up, dc_kw, 0.0),
+        "POA_Irradiance_Wm2": np.where(up, poa, 0.0),
+        "Module_Temp_C": np.where(up, tmod, 0.0),
+    }
+
+def simulate_range(start: date, end: date, step_min=5, cfg=PROJECT_CONFIG):
+    """Simulate [start, end) at `step_min` resolution with the array engine."""
+    ts = np.arange(np.datetime64(start, "m"), np.datetime64(end, "m"),
+                   np.timedelta64(step_min, "m"))
+    cols = simulate_array(ts, cfg)
+    return pd.DataFrame({"Timestamp": ts.astype("datetime64[ns]"), **cols})
+
+# ───────────────────────────────────────────────────────────────────────────────
+# 4.  Five-minute simulation for a chosen date
+# ───────────────────────────────────────────────────────────────────────────────
+def simulate_one_day(sim_date: date, step_min=5, cfg=PROJECT_CONFIG):
+    return simulate_range(sim_date, sim_date + timedelta(days=1), step_min, cfg)
+
+def simulate_one_day_scalar(sim_date: date, step_min=5):
+    """Reference scalar loop; kept to cross-check the array engine."""
     cfg = PROJECT_CONFIG
     gcr = 52.57
     month_ix = sim_date.month - 1
@@ -140,12 +225,12 @@ def simulate_one_day(sim_date: date, step_min=5):
                                       "POA_Irradiance_Wm2", "Module_Temp_C"])
 
 # ───────────────────────────────────────────────────────────────────────────────
-# 4.  Main entry point
+# 5.  Main entry point
 # ───────────────────────────────────────────────────────────────────────────────
 def main(sim_date=date.today()):
     df = simulate_one_day(sim_date)
     out_file = pathlib.Path("solar_out.csv")
-    df.to_csv(out_file, index=False)
+    write_table(df, out_file)
     print(f"Saved {len(df)} rows → {out_file}")
 
     # daily energy
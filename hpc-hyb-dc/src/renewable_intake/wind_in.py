@@ -11,8 +11,12 @@ Author: Updated Script
 
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import math
+from datetime import datetime
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from data_store import write_table
 
 # Wind farm configuration (only Blackspring Ridge)
 WIND_FARM = {
@@ -49,20 +53,35 @@ def wind_power_curve(wind_speed, params):
         return params["rated_power"]
     return 0
 
-def generate_wind_data(base_date, intervals=288):
-    times, speeds = [], []
-    for i in range(intervals):
-        minutes = i * 5
-        t = base_date + timedelta(minutes=minutes)
-        hour = minutes / 60.0
-        base = 8.0
-        diurnal = 3.0 * math.sin(math.pi * (hour - 6) / 12)
-        turb = np.random.normal(0, 1.5)
-        ws = max(0, base + diurnal + turb)
-        times.append(t)
-        speeds.append(ws)
+def wind_power_curve_array(wind_speed, params):
+    """Array version of wind_power_curve (same piecewise shape, via masks)."""
+    ws = np.asarray(wind_speed, dtype=float)
+    ratio = (ws - params["cut_in"]) / (params["rated"] - params["cut_in"])
+    p = np.where(ws < params["rated"], params["rated_power"] * ratio, params["rated_power"])
+    return np.where((ws < params["cut_in"]) | (ws > params["cut_out"]), 0.0, p)
+
+def generate_wind_scenarios(base_date, intervals=288, scenarios=1, seed=None,
+                            step_min=5):
+    """
+    Draw `scenarios` wind-speed days in one call.
+    `seed` may be an int, None or a numpy.random.Generator; the same seed
+    always gives the same (scenarios, intervals) speed matrix.
+    Returns (times, speeds) with times as a datetime64 array.
+    """
+    rng = np.random.default_rng(seed)
+    minutes = np.arange(intervals) * step_min
+    times = np.datetime64(base_date, "m") + minutes.astype("timedelta64[m]")
+    hour = minutes / 60.0
+    base = 8.0
+    diurnal = 3.0 * np.sin(np.pi * (hour - 6) / 12)
+    turb = rng.normal(0, 1.5, size=(scenarios, intervals))
+    speeds = np.maximum(0, base + diurnal + turb)
     return times, speeds
 
+def generate_wind_data(base_date, intervals=288, seed=None):
+    times, speeds = generate_wind_scenarios(base_date, intervals, 1, seed)
+    return list(times.astype(datetime)), list(speeds[0])
+
 def calc_power(ws, farm):
     p_turbine = wind_power_curve(ws, farm["turbine"])
     total = p_turbine * farm["num_turbines"]
@@ -70,26 +89,27 @@ def calc_power(ws, farm):
     total *= (0.35 / 0.5)
     return min(total, farm["capacity"])
 
-def main():
-    date_sim = datetime(2025, 7, 11)
-    times, speeds = generate_wind_data(date_sim)
+def calc_power_array(ws, farm):
+    total = wind_power_curve_array(ws, farm["turbine"]) * farm["num_turbines"]
+    total *= (0.35 / 0.5)
+    return np.minimum(total, farm["capacity"])
+
+def hpc_max_scenarios(base_date, intervals=288, scenarios=1, seed=None, farm=WIND_FARM):
+    """HPC_Max_MW for every scenario as a (scenarios, intervals) array."""
+    times, speeds = generate_wind_scenarios(base_date, intervals, scenarios, seed)
+    return times, calc_power_array(speeds, farm) * HPC_ALLOCATION_MAX
 
-    farm = WIND_FARM
+def main(seed=None):
+    date_sim = datetime(2025, 7, 11)
+    times, hpc_max = hpc_max_scenarios(date_sim, seed=seed)
 
     # Only store Timestamp and HPC_Max_MW
-    output_rows = []
-    for idx, ws in enumerate(speeds):
-        ac = calc_power(ws, farm)
-        hpc_max = ac * HPC_ALLOCATION_MAX
-        output_rows.append({
-            "Timestamp": times[idx],
-            "HPC_Max_MW": hpc_max
-        })
-
-    # Save CSV with only Timestamp and HPC_Max_MW
-    df_out = pd.DataFrame(output_rows)
+    df_out = pd.DataFrame({
+        "Timestamp": times.astype("datetime64[ns]"),
+        "HPC_Max_MW": hpc_max[0]
+    })
     filename = "wind_farm_hpc_max_output.csv"
-    df_out.to_csv(filename, index=False)
+    write_table(df_out, filename)
 
     # Optional: Print summary
     dt_hr = 5/60
@@ -1,5 +1,45 @@
-import streamlit as st
+import time
+
+import numpy as np
 import pandas as pd
+import streamlit as st
+
+from bms_worker import BMSWorker
+from downsample import downsample_indices, MAX_CHART_POINTS
+
+POLL_SECONDS = 0.5
+POINTS_PER_STEP = 96   # chart points appended per simulated day
+
+CHART_COLUMNS = ["battery_charge_percent"]
+POWER_COLUMNS = ["excess_energy_mw", "grid_power_mw", "battery_power_mw"]
+
+
+def _chart_rows(df, columns, max_points):
+    idx = downsample_indices(df[columns[0]].to_numpy(), max_points, method="minmax")
+    return df.iloc[idx].set_index("time_hours")[columns]
+
+
+def _append_rows(chart_df, new, columns):
+    # append a decimated slice of the new rows; re-decimate the (small) chart frame if it outgrows the budget
+    chart_df = pd.concat([chart_df, _chart_rows(new, columns, POINTS_PER_STEP)])
+    if len(chart_df) > MAX_CHART_POINTS:
+        chart_df = _chart_rows(chart_df.reset_index(), columns, MAX_CHART_POINTS)
+    return chart_df
+
+
+def _energy_totals(df, dt):
+    # (excess available, excess used, grid) in MWh
+    return np.array([df["excess_energy_mw"].sum(),
+                     (df["excess_energy_mw"] - df["unused_excess_mw"]).sum(),
+                     df["grid_power_mw"].sum()]) * dt
+
+
+def _show_metrics(placeholders, soc, totals, initial_charge_percent):
+    excess, used, grid = totals
+    placeholders[0].metric("Charge Level", f"{soc:.1f}%", f"{soc - initial_charge_percent:+.1f}%")
+    placeholders[1].metric("Grid Energy", f"{grid:,.1f} MWh")
+    placeholders[2].metric("Excess Used", f"{used / excess * 100:.1f}%" if excess > 0 else "–")
+
 
 def render_battery_page():
     st.markdown("""
@@ -12,20 +52,23 @@ def render_battery_page():
         <hr style='border: 1px solid #ccc; margin-top: 10px; margin-bottom: 30px;'>
     """, unsafe_allow_html=True)
 
-    col1, col2, col3 = st.columns(3)
-    col1.metric("Battery Health", "92%", "▲ 1.2%")
-    col2.metric("Charge Level", "76%", "▼ 4%")
-    col3.metric("Temperature", "34°C", "▲ 2°C")
+    # Simulation inputs (same defaults as battery.py)
+    c1, c2, c3, c4 = st.columns(4)
+    capacity = c1.number_input("Battery capacity (MWh)", min_value=1.0, value=100.0)
+    initial_charge = c2.number_input("Initial charge (%)", min_value=0.0, max_value=100.0, value=50.0)
+    datacenter_power = c3.number_input("Data center base power (MW)", min_value=1.0, value=50.0)
+    hours = c4.number_input("Duration (hours)", min_value=1, value=24 * 7, step=24)
 
-    st.markdown("---")
-
-    st.subheader("📈 Charge History (Past 7 Days)")
-    data = {
-        "Day": ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"],
-        "Charge %": [80, 85, 82, 78, 75, 77, 76]
-    }
-    df = pd.DataFrame(data)
-    st.line_chart(df.set_index("Day"))
+    b1, b2, _ = st.columns([1, 1, 6])
+    worker = st.session_state.get("bms_worker")
+    if b1.button("Run Simulation ▶"):
+        if worker is not None:
+            worker.stop()
+        worker = BMSWorker(capacity, initial_charge, datacenter_power, int(hours))
+        worker.start()
+        st.session_state["bms_worker"] = worker
+    if b2.button("Stop ■") and worker is not None:
+        worker.stop()
 
     st.markdown("### ⚙️ Battery Controls")
     mode = st.radio("Select Battery Mode", ["Performance", "Balanced", "Eco"])
@@ -36,4 +79,48 @@ def render_battery_page():
     else:
         st.warning("Auto-discharge protection is OFF.")
 
-    st.button("Run Diagnostics 🔍")
\ No newline at end of file
+    if worker is None:
+        st.info("Set the battery parameters and press Run Simulation.")
+        return
+
+    st.markdown("---")
+
+    metrics = [col.empty() for col in st.columns(3)]
+    progress = st.progress(0.0)
+
+    # Draw what is already simulated, then poll the worker and append only the new rows;
+    # the charts hold a decimated copy so each redraw stays small on long runs
+    df, row = worker.rows_since(0)
+    st.subheader("📈 Charge Level (%)")
+    soc_chart = st.empty()
+    st.subheader("⚡︎ Excess, Grid and Battery Power (MW)")
+    power_chart = st.empty()
+    soc_df = _chart_rows(df, CHART_COLUMNS, MAX_CHART_POINTS)
+    power_df = _chart_rows(df, POWER_COLUMNS, MAX_CHART_POINTS)
+    soc_chart.line_chart(soc_df)
+    power_chart.line_chart(power_df)
+    dt = worker.bms.time_interval
+    totals = _energy_totals(df, dt)
+    soc = df["battery_charge_percent"].iloc[-1] if len(df) else worker.initial_charge_percent
+    _show_metrics(metrics, soc, totals, worker.initial_charge_percent)
+
+    while True:
+        running = worker.is_alive()
+        new, row = worker.rows_since(row)
+        if len(new):
+            soc_df = _append_rows(soc_df, new, CHART_COLUMNS)
+            power_df = _append_rows(power_df, new, POWER_COLUMNS)
+            soc_chart.line_chart(soc_df)
+            power_chart.line_chart(power_df)
+            totals += _energy_totals(new, dt)
+            soc = new["battery_charge_percent"].iloc[-1]
+            _show_metrics(metrics, soc, totals, worker.initial_charge_percent)
+        progress.progress(min(worker.progress, 1.0),
+                          text=f"Simulated {worker.bms.next_interval * dt:.0f} of "
+                               f"{worker.total_intervals * dt:.0f} hours")
+        if not running:
+            break
+        time.sleep(POLL_SECONDS)
+
+    if worker.error is not None:
+        st.error(f"⚠️ Simulation failed: {worker.error}")
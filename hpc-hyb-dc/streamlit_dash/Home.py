@@ -15,21 +15,30 @@ import plotly.graph_objects as go
 from streamlit_option_menu import option_menu
 
 from Battery_Management import render_battery_page
-from data_combine import wind_load_combi
-from data_combine import solar_load_combi
-from data_combine import energy_sum_profile
+from data_combine import combined_profile
+from dataset_cache import load_series
+from downsample import downsample_indices
 
 ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 # Add root dir to sys.path
 if ROOT_DIR not in sys.path:
     sys.path.append(ROOT_DIR)
 
-from src.hpp_core.hpc_dc_config import build_load_profile
+from src.hpp_core.hpc_dc_config import cached_load_profile
 WIND_FILE = "/Users/sarthak/Desktop/LHE Digitial Twin/Final_Implementation/hpc-hyb-dc/src/hpp_core/csv_files/wind_farm_hpc_max_output.csv"
 SOLAR_FILE = "/Users/sarthak/Desktop/LHE Digitial Twin/Final_Implementation/hpc-hyb-dc/src/hpp_core/csv_files/solar_out.csv"
 
 st.set_page_config(page_title="LHE Dashboard", layout="wide")
 
+
+def zoom_range(ts, key):
+    """Zoom slider over the datetime64 array `ts` when it spans more than a day, else None."""
+    if len(ts) == 0 or ts[-1] - ts[0] <= np.timedelta64(1, "D"):
+        return None
+    first, last = pd.Timestamp(ts[0]).to_pydatetime(), pd.Timestamp(ts[-1]).to_pydatetime()
+    return st.slider("Zoom", min_value=first, max_value=last, value=(first, last),
+                     format="YYYY-MM-DD HH:mm", key=key)
+
 # Hide default Streamlit page navigation
 st.markdown("""
     <style>
@@ -144,67 +153,44 @@ if selected == "Home":
 
     #Represents the load graph
     with col12:
-        # Build the profile and save to CSV
-        profile_df = build_load_profile(load_value)
-        filename = f"dc_{int(load_value)}MW_load_profile.csv"
-        profile_df.to_csv(filename, index=False)
-
-        #Loading the load csv file.
-        load_df = pd.read_csv(filename)
-        load_df["Timestamp"] = pd.to_datetime(load_df["Timestamp"])
+        # Build the profile (memoized, no CSV round-trip)
+        load_df = cached_load_profile(load_value)
         load_df["Time"] = load_df["Timestamp"].dt.strftime("%H:%M")
 
-        #Loading the wind file 
-        load_df["Timestamp"] = pd.to_datetime(load_df["Timestamp"])
-
-        #Combining wind and load file 
-        wind_load_df = wind_load_combi(load_df, farm_ratio*0.01, windfarms)
-
-        #Combining Solar file
-        solar_load_df = solar_load_combi(wind_load_df, farm_ratio*0.01, solarfarms)
-
-        #Getting net Energy profile
-        net_output_df = energy_sum_profile(solar_load_df)
-
-        plot_df = net_output_df[["Time", "Load_MW", "wind_output", "solar_output", "net_output"]].copy()
-        plot_df = plot_df.set_index("Time")
+        #Combining load, wind and solar in one vectorized pass
+        net_output_df = combined_profile(load_df, farm_ratio*0.01, windfarms, solarfarms)
+        missing = {src: len(ts) for src, ts in net_output_df.attrs["missing_slots"].items() if len(ts)}
+        if missing:
+            st.warning("⚠️ No data for some load intervals (counted as zero output): " +
+                       ", ".join(f"{src} {n} slots" for src, n in missing.items()))
+        duplicated = {src: len(ts) for src, ts in net_output_df.attrs["duplicate_slots"].items() if len(ts)}
+        if duplicated:
+            st.warning("⚠️ Several source rows share a time slot (averaged): " +
+                       ", ".join(f"{src} {n} rows" for src, n in duplicated.items()))
 
         st.subheader("⚡︎ Energy Required v/s Renewables Output")
 
+        # Long horizons: pick a window, then draw at most MAX_CHART_POINTS per trace
+        ts = net_output_df["Timestamp"].to_numpy(dtype="datetime64[ns]")
+        x_range = zoom_range(ts, "zoom_load")
+        multi_day = len(ts) > 0 and ts[-1] - ts[0] > np.timedelta64(1, "D")
+        x_labels = net_output_df["Timestamp"] if multi_day else net_output_df["Time"]
+
         # Create a Plotly line chart with Load_kW and wind_output
         fig = go.Figure()
 
-        fig.add_trace(go.Scatter(
-            x=net_output_df["Time"],
-            y=net_output_df["Load_MW"],
-            mode='lines',
-            name='Load (MW)',
-            line=dict(color='blue')
-        ))
-
-        fig.add_trace(go.Scatter(
-            x=net_output_df["Time"],
-            y=net_output_df["wind_output"],
-            mode='lines',
-            name='Wind Output (MW)',
-            line=dict(color='white')
-        ))
-
-        fig.add_trace(go.Scatter(
-            x=net_output_df["Time"],
-            y=net_output_df["solar_output"],
-            mode='lines',
-            name='Solar Output (MW)',
-            line=dict(color='red')
-        ))
-
-        fig.add_trace(go.Scatter(
-            x=net_output_df["Time"],
-            y=net_output_df["net_output"],
-            mode='lines',
-            name='Net Output (MW)',
-            line=dict(color='green')
-        ))
+        for col, name, color in [("Load_MW", "Load (MW)", "blue"),
+                                 ("wind_output", "Wind Output (MW)", "white"),
+                                 ("solar_output", "Solar Output (MW)", "red"),
+                                 ("net_output", "Net Output (MW)", "green")]:
+            idx = downsample_indices(net_output_df[col].to_numpy(), x=ts, x_range=x_range)
+            fig.add_trace(go.Scatter(
+                x=x_labels.iloc[idx],
+                y=net_output_df[col].iloc[idx],
+                mode='lines',
+                name=name,
+                line=dict(color=color)
+            ))
 
         fig.update_layout(
             xaxis_title='Time',
@@ -226,21 +212,16 @@ if selected == "Home":
     with col21:
         st.subheader("✇ Wind Output Profile")
 
-        # Load wind CSV
-        wind_df = pd.read_csv(WIND_FILE)
-        wind_df["Timestamp"] = pd.to_datetime(wind_df["Timestamp"])
-        wind_df["Time"] = wind_df["Timestamp"].dt.strftime("%H:%M")
-
-        # Auto-detect the wind column
-        wind_col = next((col for col in wind_df.columns if "HPC_Max_MW" in col), None)
-        if wind_col is None:
+        # Wind series from the shared dataset cache
+        wind = load_series(WIND_FILE, "HPC_Max_MW")
+        if wind is None:
             st.error("⚠️ Could not find wind power column in file.")
         else:
-            # Rename and scale based on number of windfarms
-            wind_df["Wind_MW"] = wind_df[wind_col] * windfarms
-
-            # Plot
-            st.line_chart(wind_df.set_index("Time")["Wind_MW"])  
+            # Scale based on number of windfarms
+            x_range = zoom_range(wind["timestamp"], "zoom_wind")
+            idx = downsample_indices(wind["values"], x=wind["timestamp"], x_range=x_range)
+            st.line_chart(pd.DataFrame({"Wind_MW": wind["values"][idx] * windfarms},
+                                       index=pd.DatetimeIndex(wind["timestamp"][idx], name="Timestamp")))
 
     with col_divider2: 
         st.markdown("""
@@ -254,21 +235,16 @@ if selected == "Home":
     with col22:     
         st.subheader("☀︎ Solar Output Profile")
 
-        # Load wind CSV
-        solar_df = pd.read_csv(SOLAR_FILE)
-        solar_df["Timestamp"] = pd.to_datetime(solar_df["Timestamp"])
-        solar_df["Time"] = solar_df["Timestamp"].dt.strftime("%H:%M")
-
-        # Auto-detect the wind column
-        solar_col = next((col for col in solar_df.columns if "AC_kW" in col), None)
-        if wind_col is None:
+        # Solar series from the shared dataset cache
+        solar = load_series(SOLAR_FILE, "AC_kW")
+        if solar is None:
             st.error("⚠️ Could not find solar power column in file.")
         else:
-            # Rename and scale based on number of windfarms
-            solar_df["Solar_MW"] = solar_df[solar_col] * solarfarms * 0.001
-
-            # Plot
-            st.line_chart(solar_df.set_index("Time")["Solar_MW"]) 
+            # Scale based on number of solarfarms
+            x_range = zoom_range(solar["timestamp"], "zoom_solar")
+            idx = downsample_indices(solar["values"], x=solar["timestamp"], x_range=x_range)
+            st.line_chart(pd.DataFrame({"Solar_MW": solar["values"][idx] * solarfarms * 0.001},
+                                       index=pd.DatetimeIndex(solar["timestamp"][idx], name="Timestamp")))
 
 elif selected == "Battery Management":
     render_battery_page()
\ No newline at end of file
@@ -0,0 +1,53 @@
+import os
+import sys
+import threading
+
+BMS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'battery_management'))
+if BMS_DIR not in sys.path:
+    sys.path.append(BMS_DIR)
+
+from battery import RealTimeBMS, MegawattBattery, MegawattDataCenter, ExcessEnergyReader
+
+EXCESS_FILE = os.path.join(BMS_DIR, "excess_energy_output.csv")
+STEP_HOURS = 24  # one simulated day per step
+
+
+class BMSWorker(threading.Thread):
+    """
+    Runs a RealTimeBMS in the background, STEP_HOURS at a time, so the
+    page can poll for new rows while the simulation is still going.
+    """
+    def __init__(self, capacity_mwh, initial_charge_percent, datacenter_power, hours,
+                 excess_file=EXCESS_FILE, step_hours=STEP_HOURS):
+        super().__init__(daemon=True)
+        self.bms = RealTimeBMS(MegawattBattery(capacity_mwh, initial_charge_percent),
+                               MegawattDataCenter(base_power_mw=datacenter_power),
+                               ExcessEnergyReader(excess_file))
+        self.total_intervals = self.bms.intervals_for(hours)
+        self.step_intervals = self.bms.intervals_for(step_hours)
+        self.initial_charge_percent = initial_charge_percent
+        self.error = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        try:
+            while self.bms.next_interval < self.total_intervals and not self._stop_event.is_set():
+                n = min(self.step_intervals, self.total_intervals - self.bms.next_interval)
+                with self._lock:
+                    self.bms.step(n)
+        except Exception as e:
+            self.error = e
+
+    def stop(self):
+        self._stop_event.set()
+
+    @property
+    def progress(self):
+        return self.bms.next_interval / self.total_intervals
+
+    def rows_since(self, row):
+        """Copy of the history rows from `row` on, and the row count to poll from next."""
+        with self._lock:
+            size = len(self.bms.history)
+            return self.bms.history.to_frame(row).copy(), size
@@ -1,56 +1,106 @@
-import streamlit as st
-import pandas as pd
 import numpy as np
 
+from dataset_cache import load_series
+
 WIND_FILE = "/Users/sarthak/Desktop/LHE Digitial Twin/Final_Implementation/hpc-hyb-dc/src/hpp_core/csv_files/wind_farm_hpc_max_output.csv"
 SOLAR_FILE = "/Users/sarthak/Desktop/LHE Digitial Twin/Final_Implementation/hpc-hyb-dc/src/hpp_core/csv_files/solar_out.csv"
+INTERVAL_MIN = 5
 
-def wind_load_combi(load_df, farm_ratio, windfarms):
-    # Load CSVs
-    load_df = load_df.copy()
-    load_df["Load_MW"] = load_df["Load_kW"]*0.001
-    wind_df = pd.read_csv(WIND_FILE)
-    wind_df["Timestamp"] = pd.to_datetime(wind_df["Timestamp"])
-    wind_df = wind_df.copy()
+def combine_outputs(load_mw, wind_mw, solar_mw, farm_ratio, windfarms, solarfarms):
+    """
+    Array-level wind/solar/net combination.
+    Each farm type covers at most its share of the load (farm_ratio for wind,
+    1 - farm_ratio for solar). Returns (wind_output, solar_output, net_output).
+    """
+    wind_output = np.minimum(np.asarray(wind_mw) * windfarms, np.asarray(load_mw) * farm_ratio)
+    solar_output = np.minimum(np.asarray(solar_mw) * solarfarms, np.asarray(load_mw) * (1 - farm_ratio))
+    return wind_output, solar_output, wind_output + solar_output
 
-    load_df["Time"] = load_df["Timestamp"].dt.time
-    wind_df["Time"] = wind_df["Timestamp"].dt.time
+def slot_index(timestamps, interval_min=INTERVAL_MIN, of_day=True):
+    """
+    Integer slot for each datetime64 timestamp: slot of day (0..1440/interval-1)
+    or, with of_day=False, slots since the Unix epoch.
+    """
+    minutes = np.asarray(timestamps, dtype="datetime64[m]").astype(np.int64)
+    if of_day:
+        minutes = minutes % (24 * 60)
+    return minutes // interval_min
 
-    # Merge on 'Time' instead of full Timestamp
-    merged_df = pd.merge(load_df, wind_df, on="Time", suffixes=('_load', '_wind'))
+def align_series(target_ts, source_ts, source_values, interval_min=INTERVAL_MIN):
+    """
+    Positional O(n) join of a source series onto target timestamps.
+    A source covering a single day is treated as a daily profile and matched
+    by slot of day (so multi-day targets repeat it); a multi-day source is
+    matched on epoch-aligned slots. Source rows sharing a slot are averaged.
+    Returns (values, missing, duplicates): values is NaN and missing is True
+    for target slots the source does not cover; duplicates holds the source
+    timestamps of every row that shares its slot with another.
+    """
+    source_ts = np.asarray(source_ts, dtype="datetime64[ns]")
+    days = source_ts.astype("datetime64[D]")
+    of_day = len(source_ts) == 0 or days.min() == days.max()
 
-    # Calculate wind output
-    merged_df["wind_output"] = merged_df.apply(
-        lambda row: min(row["HPC_Max_MW"]*windfarms, row["Load_MW"]*farm_ratio), axis=1
-    )
+    src = slot_index(source_ts, interval_min, of_day)
+    tgt = slot_index(target_ts, interval_min, of_day)
+    lo = src.min() if len(src) else 0
+    size = (src.max() - lo + 1) if len(src) else 0
+    counts = np.bincount(src - lo, minlength=size)
+    sums = np.bincount(src - lo, weights=np.asarray(source_values, dtype=float), minlength=size)
+    with np.errstate(invalid="ignore"):
+        lookup = sums / counts   # NaN for slots with no source row
 
-    # print(merged_df)
-    return merged_df
+    pos = tgt - lo
+    inside = (pos >= 0) & (pos < len(lookup))
+    values = np.full(len(tgt), np.nan)
+    values[inside] = lookup[pos[inside]]
+    return values, np.isnan(values), source_ts[counts[src - lo] > 1]
 
-def solar_load_combi(wind_load_df, farm_ratio, solarfarms):
-    wind_load_df = wind_load_df.copy()
+def _with_wind(load_df):
+    wind = load_series(WIND_FILE, "HPC_Max_MW")
+    ts = load_df["Timestamp"].to_numpy(dtype="datetime64[ns]")
+    wind_mw, missing, duplicates = align_series(ts, wind["timestamp"], wind["values"])
+    df = load_df.assign(Load_MW=load_df["Load_kW"]*0.001, HPC_Max_MW=wind_mw)
+    if "Time" not in df:
+        df["Time"] = df["Timestamp"].dt.strftime("%H:%M")
+    df.attrs["missing_slots"] = {**load_df.attrs.get("missing_slots", {}), "wind": ts[missing]}
+    df.attrs["duplicate_slots"] = {**load_df.attrs.get("duplicate_slots", {}), "wind": duplicates}
+    return df
+
+def _with_solar(wind_load_df):
+    solar = load_series(SOLAR_FILE, "AC_kW")
+    ts = wind_load_df["Timestamp"].to_numpy(dtype="datetime64[ns]")
+    solar_kw, missing, duplicates = align_series(ts, solar["timestamp"], solar["values"])
+    df = wind_load_df.assign(AC_MW=solar_kw*0.001)
+    df.attrs["missing_slots"] = {**wind_load_df.attrs.get("missing_slots", {}), "solar": ts[missing]}
+    df.attrs["duplicate_slots"] = {**wind_load_df.attrs.get("duplicate_slots", {}), "solar": duplicates}
+    return df
 
-    solar_df = pd.read_csv(SOLAR_FILE)
-    solar_df["Timestamp"] = pd.to_datetime(solar_df["Timestamp"])
-    solar_df = solar_df.copy()
+def combined_profile(load_df, farm_ratio, windfarms, solarfarms):
+    """
+    Load with wind and solar aligned by time slot, plus wind_output, solar_output
+    and net_output. Slots a source does not cover count as zero output and are
+    listed per source in df.attrs["missing_slots"]; source rows that share a
+    slot are averaged and listed in df.attrs["duplicate_slots"].
+    """
+    df = _with_solar(_with_wind(load_df))
+    df["wind_output"], df["solar_output"], df["net_output"] = combine_outputs(
+        df["Load_MW"].to_numpy(), np.nan_to_num(df["HPC_Max_MW"].to_numpy()),
+        np.nan_to_num(df["AC_MW"].to_numpy()), farm_ratio, windfarms, solarfarms)
+    return df
 
-    solar_df["AC_MW"] = solar_df["AC_kW"]*0.001
-    solar_df["Time"] = solar_df["Timestamp"].dt.time
+def wind_load_combi(load_df, farm_ratio, windfarms):
+    """Load plus wind_output; uncovered slots count as zero output, as in combined_profile."""
+    merged_df = _with_wind(load_df)
+    merged_df["wind_output"] = np.minimum(merged_df["HPC_Max_MW"].fillna(0)*windfarms,
+                                          merged_df["Load_MW"]*farm_ratio)
+    return merged_df
 
-    solar_combi_df = pd.merge(wind_load_df, solar_df, on="Time", suffixes=('_load', '_solar'))
-    solar_combi_df["solar_output"] = solar_combi_df.apply(
-        lambda row: min(row["AC_MW"]*solarfarms, row["Load_MW"]*(1-farm_ratio)), axis=1
-    )
-    # print(solar_combi_df)
+def solar_load_combi(wind_load_df, farm_ratio, solarfarms):
+    """Adds solar_output; uncovered slots count as zero output, as in combined_profile."""
+    solar_combi_df = _with_solar(wind_load_df)
+    solar_combi_df["solar_output"] = np.minimum(solar_combi_df["AC_MW"].fillna(0)*solarfarms,
+                                                solar_combi_df["Load_MW"]*(1-farm_ratio))
     return solar_combi_df
 
 def energy_sum_profile(solar_combi_df):
-    
-    solar_combi_df = solar_combi_df.copy()
-
-    solar_combi_df["net_output"] = solar_combi_df.apply(
-        lambda row: row["solar_output"]+ row["wind_output"], axis=1
-    ) 
-    # print (solar_combi_df)
-    return solar_combi_df
-    
+    return solar_combi_df.assign(net_output=solar_combi_df["solar_output"] + solar_combi_df["wind_output"])
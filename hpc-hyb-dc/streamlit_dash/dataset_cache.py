@@ -0,0 +1,40 @@
+import os
+import sys
+
+import numpy as np
+import streamlit as st
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+if SRC_DIR not in sys.path:
+    sys.path.append(SRC_DIR)
+
+from data_store import read_table
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def _load_series(path, column, mtime_ns):
+    # One parsed copy per (file, column, mtime), shared by every session.
+    df = read_table(path)
+    col = next((c for c in df.columns if column in c), None)
+    if col is None:
+        return None
+    timestamps = df["Timestamp"].to_numpy(dtype="datetime64[ns]")
+    series = {
+        "column": col,
+        "timestamp": timestamps,
+        "values": df[col].to_numpy(dtype=float),
+    }
+    for arr in series.values():
+        if isinstance(arr, np.ndarray):
+            arr.flags.writeable = False
+    return series
+
+
+def load_series(path, column):
+    """
+    Time-indexed arrays for the first column of `path` whose name contains
+    `column`, or None if there is no such column. Parsed once per process
+    and re-read only when the file's mtime changes; the arrays are
+    read-only and shared, so scale them (e.g. by windfarms) at render time.
+    """
+    return _load_series(path, column, os.stat(path).st_mtime_ns)
@@ -0,0 +1,76 @@
+import numpy as np
+
+MAX_CHART_POINTS = 2000
+
+
+def lttb_indices(y, n_out, x=None):
+    """
+    Largest-Triangle-Three-Buckets: indices of `n_out` points that keep the
+    visual shape of (x, y). x defaults to the sample position; datetime64 x
+    is used as integer time.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=float) if x is None else np.asarray(x).astype(np.int64).astype(float)
+
+    # first and last points are kept; the rest is split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            nxt = slice(edges[i + 1], edges[i + 2])
+        else:
+            nxt = slice(n - 1, n)
+        avg_x = x[nxt].mean()
+        avg_y = np.nanmean(y[nxt]) if np.isfinite(y[nxt]).any() else y[a]
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) -
+                      (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        idx[i + 1] = a
+    return idx
+
+
+def minmax_indices(y, n_buckets):
+    """Indices of the min and max sample in each of `n_buckets` equal buckets (sorted)."""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if 2 * n_buckets >= n:
+        return np.arange(n)
+    size = -(-n // n_buckets)
+    padded = np.full(size * n_buckets, np.nan)
+    padded[:n] = y
+    blocks = padded.reshape(n_buckets, size)
+    valid = ~np.isnan(blocks).all(axis=1)
+    offsets = np.arange(n_buckets)[valid] * size
+    lo = offsets + np.nanargmin(blocks[valid], axis=1)
+    hi = offsets + np.nanargmax(blocks[valid], axis=1)
+    return np.unique(np.concatenate([lo, hi, [0, n - 1]]))
+
+
+def window(x, x_range):
+    """Slice of the sorted array `x` that falls inside x_range=(start, end); None means all."""
+    if x_range is None:
+        return slice(0, len(x))
+    lo = np.searchsorted(x, np.asarray(x_range[0], dtype=x.dtype), side="left")
+    hi = np.searchsorted(x, np.asarray(x_range[1], dtype=x.dtype), side="right")
+    return slice(int(lo), int(hi))
+
+
+def downsample_indices(y, max_points=MAX_CHART_POINTS, x=None, x_range=None, method="lttb"):
+    """
+    Indices into y (and x) to draw for the visible window. Only the points in
+    x_range are considered, so zooming in re-samples at full detail.
+    """
+    y = np.asarray(y)
+    sl = window(np.asarray(x), x_range) if x is not None else slice(0, len(y))
+    xs = None if x is None else np.asarray(x)[sl]
+    if method == "minmax":
+        local = minmax_indices(y[sl], max_points // 2)
+    else:
+        local = lttb_indices(y[sl], max_points, xs)
+    return local + sl.start
@@ -0,0 +1,21 @@
+import os
+import sys
+
+# The pipeline modules import their siblings as top-level modules
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+DASH_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'streamlit_dash'))
+for path in [os.path.join(SRC_DIR, sub) for sub in ('', 'battery_management', 'renewable_intake', 'hpp-core')] \
+        + [DASH_DIR]:
+    if path not in sys.path:
+        sys.path.append(path)
+
+import pytest
+
+EXCESS_CSV = os.path.join(SRC_DIR, 'battery_management', 'excess_energy_output.csv')
+
+
+@pytest.fixture(scope="session")
+def excess_reader():
+    """The bundled one-day, 5-minute excess series."""
+    from battery import ExcessEnergyReader
+    return ExcessEnergyReader(EXCESS_CSV)
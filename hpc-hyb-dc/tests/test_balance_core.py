@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from balance_core import balance_arrays, balance_frame
+
+
+def _original_balance(df):
+    """hpp.balance before the shared kernel: wind plus solar only, no grid limits."""
+    df = df.copy()
+    df["Solar_MW"] = df["Solar_kW"] / 1000.0
+    df["Renewable_MW"] = df["Wind_MW"] + df["Solar_MW"]
+    df["Load_MW"] = df["Load_kW"] / 1000.0
+    df["Excess_MW"] = (df["Renewable_MW"] - df["Load_MW"]).clip(lower=0)
+    df["Deficit_MW"] = (df["Load_MW"] - df["Renewable_MW"]).clip(lower=0)
+    df["Grid_Supply_MW"] = df["Deficit_MW"]
+    return df
+
+
+def _frame(n=288, seed=5):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Timestamp": pd.date_range("2025-07-11", periods=n, freq="5min"),
+        "Load_kW": rng.uniform(3000, 9000, n),
+        "Wind_MW": rng.uniform(0, 8, n),
+        "Solar_kW": rng.uniform(0, 4000, n),
+    })
+
+
+def test_balance_frame_matches_original_balance():
+    df = _frame()
+    expected = _original_balance(df)
+    got = balance_frame(df.assign(Load_MW=df["Load_kW"] / 1000.0, Solar_MW=df["Solar_kW"] / 1000.0),
+                        ["Wind_MW", "Solar_MW"])
+    for col in ("Renewable_MW", "Excess_MW", "Deficit_MW", "Grid_Supply_MW"):
+        np.testing.assert_array_equal(got[col].to_numpy(), expected[col].to_numpy(), err_msg=col)
+    assert (got["Unserved_MW"] == 0).all() and (got["Curtailed_MW"] == 0).all()
+
+
+def test_stacked_portfolios_match_one_at_a_time():
+    rng = np.random.default_rng(11)
+    load = rng.uniform(2, 10, 96)
+    farms = rng.uniform(0, 3, (4, 5, 96))    # 4 portfolios of 5 farms
+    stacked = balance_arrays(load, farms, import_limit=4.0, export_limit=1.5)
+    for p in range(len(farms)):
+        single = balance_arrays(load, {f"farm_{k}": farms[p, k] for k in range(farms.shape[1])},
+                                import_limit=4.0, export_limit=1.5)
+        for col, values in single.items():
+            np.testing.assert_allclose(stacked[col][p], values, rtol=1e-12, err_msg=col)
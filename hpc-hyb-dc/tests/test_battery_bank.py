@@ -0,0 +1,36 @@
+import numpy as np
+
+from battery import BatteryBank
+from battery_model import MegawattBattery
+
+
+def _batteries():
+    return [MegawattBattery(capacity, initial, max_c, max_d, eff_c, eff_d)
+            for capacity, initial, max_c, max_d, eff_c, eff_d in
+            [(100, 50, 50, 50, 1.0, 1.0), (40, 90, 20, 10, 0.95, 0.9),
+             (250, 60, 80, 120, 0.9, 1.0), (10, 55, 5, 5, 1.0, 0.85)]]
+
+
+def test_bank_steps_like_individual_batteries():
+    rng = np.random.default_rng(7)
+    batteries = _batteries()
+    bank = BatteryBank.from_batteries(batteries)
+    hours = 5 / 60
+    for _ in range(500):
+        power = rng.uniform(-150, 150, len(batteries))
+        charge = np.clip(-power, 0, None)
+        discharge = np.clip(power, 0, None)
+        got_c = bank.charge(charge, hours)
+        got_d = bank.discharge(discharge, hours)
+        want_c = [b.charge(p, hours) for b, p in zip(batteries, charge)]
+        want_d = [b.discharge(p, hours) for b, p in zip(batteries, discharge)]
+        np.testing.assert_allclose(got_c, want_c, rtol=1e-12, atol=1e-12)
+        np.testing.assert_allclose(got_d, want_d, rtol=1e-12, atol=1e-12)
+        np.testing.assert_allclose(bank.current_charge, [b.current_charge for b in batteries],
+                                   rtol=1e-12, atol=1e-12)
+
+
+def test_sweep_is_capacity_major():
+    bank = BatteryBank.sweep([50, 100], [60, 80, 90])
+    np.testing.assert_array_equal(bank.capacity_mwh, [50, 50, 50, 100, 100, 100])
+    np.testing.assert_allclose(bank.get_charge_percentage(), [60, 80, 90] * 2)
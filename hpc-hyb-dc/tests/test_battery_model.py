@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from battery_model import MegawattBattery
+from degradation import DegradationModel, RainflowCounter
+
+# ASTM E1049 rainflow example: one full cycle of range 4, the rest half cycles
+ASTM_SEQUENCE = [-2, 1, -3, 5, -1, 3, -4, 4, -2]
+ASTM_FULL = [4]
+ASTM_HALF = [3, 4, 8, 9, 8, 6]
+
+
+class LosslessBattery:
+    """MegawattBattery as it was before efficiencies, taper and degradation."""
+    def __init__(self, capacity_mwh=100, initial_charge_percent=50):
+        self.current_charge = (initial_charge_percent / 100) * capacity_mwh
+        self.max_charge_power = 50
+        self.max_discharge_power = 50
+        self.min_charge = 0.55 * capacity_mwh
+        self.max_charge_limit = 0.95 * capacity_mwh
+
+    def charge(self, power_mw, hours):
+        if power_mw <= 0:
+            return 0
+        energy = min(min(power_mw, self.max_charge_power) * hours,
+                     self.max_charge_limit - self.current_charge)
+        self.current_charge += energy
+        return energy / hours if hours > 0 else 0
+
+    def discharge(self, power_mw, hours):
+        if power_mw <= 0:
+            return 0
+        energy = min(min(power_mw, self.max_discharge_power) * hours,
+                     self.current_charge - self.min_charge)
+        self.current_charge -= energy
+        return energy / hours if hours > 0 else 0
+
+
+@pytest.mark.parametrize("capacity, initial", [(100, 50), (40, 90), (250, 56)])
+def test_defaults_reproduce_lossless_battery(capacity, initial):
+    battery = MegawattBattery(capacity, initial)
+    reference = LosslessBattery(capacity, initial)
+    assert battery.round_trip_efficiency == 1.0
+    rng = np.random.default_rng(capacity)
+    for hours in rng.choice([5 / 60, 1 / 60, 1.0], 400):
+        power = rng.uniform(-80, 80)
+        if power < 0:
+            assert battery.charge(-power, hours) == reference.charge(-power, hours)
+        else:
+            assert battery.discharge(power, hours) == reference.discharge(power, hours)
+        assert battery.current_charge == reference.current_charge
+        assert battery.charge_power_limit() == battery.max_charge_power
+        assert battery.discharge_power_limit() == battery.max_discharge_power
+        battery.advance(hours)
+    assert battery.capacity_mwh == capacity
+
+
+def test_rainflow_astm_example():
+    counter = RainflowCounter()
+    closed = []
+    for x in ASTM_SEQUENCE:
+        closed += counter.add(x)
+    assert sorted(closed) == ASTM_FULL
+    assert counter.open_half_cycles().tolist() == ASTM_HALF
+
+
+def test_rainflow_ignores_points_between_reversals():
+    # the same reversals joined by straight ramps and plateaus, fed in chunks
+    path = np.concatenate([np.linspace(a, b, 7)[:-1] for a, b in zip(ASTM_SEQUENCE, ASTM_SEQUENCE[1:])]
+                          + [[ASTM_SEQUENCE[-1]] * 3])
+    counter = RainflowCounter()
+    closed = []
+    for chunk in np.array_split(path, 5):
+        closed += counter.extend(chunk)
+    np.testing.assert_allclose(sorted(closed), ASTM_FULL)
+    np.testing.assert_allclose(counter.open_half_cycles(), ASTM_HALF)
+
+
+def test_degradation_counts_open_half_cycles_at_half_weight():
+    model = DegradationModel(cycle_life=1000, dod_exponent=1.0, calendar_life_years=1e12)
+    model.extend(np.array(ASTM_SEQUENCE, dtype=float) / 10, 0.0)
+    assert model.full_cycles == pytest.approx(sum(ASTM_FULL) / 10)
+    assert model.damage(include_open=False) == pytest.approx(sum(ASTM_FULL) / 10 / 1000)
+    assert model.damage() == pytest.approx((sum(ASTM_FULL) + 0.5 * sum(ASTM_HALF)) / 10 / 1000)
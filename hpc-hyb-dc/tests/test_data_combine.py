@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_combine import align_series, combine_outputs
+
+
+def _day(values, day="2025-07-11"):
+    ts = pd.date_range(day, periods=len(values), freq="5min")
+    return pd.DataFrame({"Timestamp": ts, "value": values})
+
+
+def _row_loop(load_df, wind_df, solar_df, farm_ratio, windfarms, solarfarms):
+    """The original merge-on-time-of-day plus row-wise apply combination."""
+    df = load_df.assign(Time=load_df["Timestamp"].dt.time)
+    df = df.merge(wind_df.assign(Time=wind_df["Timestamp"].dt.time)[["Time", "HPC_Max_MW"]], on="Time")
+    df = df.merge(solar_df.assign(Time=solar_df["Timestamp"].dt.time)[["Time", "AC_MW"]], on="Time")
+    df["wind_output"] = df.apply(lambda row: min(row["HPC_Max_MW"] * windfarms,
+                                                 row["Load_MW"] * farm_ratio), axis=1)
+    df["solar_output"] = df.apply(lambda row: min(row["AC_MW"] * solarfarms,
+                                                  row["Load_MW"] * (1 - farm_ratio)), axis=1)
+    df["net_output"] = df.apply(lambda row: row["solar_output"] + row["wind_output"], axis=1)
+    return df
+
+
+@pytest.mark.parametrize("farm_ratio, windfarms, solarfarms", [(0.5, 1, 1), (0.3, 4, 12), (0.9, 2, 0)])
+def test_vectorized_combination_matches_row_loop(farm_ratio, windfarms, solarfarms):
+    rng = np.random.default_rng(3)
+    load_df = _day(rng.uniform(4, 8, 288)).rename(columns={"value": "Load_MW"})
+    wind_df = _day(rng.uniform(0, 3, 288), "2025-01-02").rename(columns={"value": "HPC_Max_MW"})
+    solar_df = _day(rng.uniform(0, 2, 288), "2025-03-04").rename(columns={"value": "AC_MW"})
+    expected = _row_loop(load_df, wind_df, solar_df, farm_ratio, windfarms, solarfarms)
+
+    ts = load_df["Timestamp"].to_numpy()
+    wind, wind_missing, _ = align_series(ts, wind_df["Timestamp"], wind_df["HPC_Max_MW"])
+    solar, solar_missing, _ = align_series(ts, solar_df["Timestamp"], solar_df["AC_MW"])
+    assert not wind_missing.any() and not solar_missing.any()
+    outputs = combine_outputs(load_df["Load_MW"].to_numpy(), wind, solar,
+                              farm_ratio, windfarms, solarfarms)
+    for col, got in zip(("wind_output", "solar_output", "net_output"), outputs):
+        np.testing.assert_array_equal(got, expected[col].to_numpy(), err_msg=col)
+
+
+def test_align_series_reports_gaps_and_averages_shared_slots():
+    source_ts = np.array(["2025-07-01T00:00", "2025-07-01T00:02", "2025-07-01T00:05",
+                          "2025-07-01T00:15"], dtype="datetime64[ns]")
+    target_ts = np.arange(np.datetime64("2025-07-02T00:00"), np.datetime64("2025-07-02T00:20"),
+                          np.timedelta64(5, "m"))
+    values, missing, duplicates = align_series(target_ts, source_ts, [1.0, 3.0, 5.0, 7.0])
+    np.testing.assert_array_equal(values, [2.0, 5.0, np.nan, 7.0])
+    np.testing.assert_array_equal(missing, [False, False, True, False])
+    np.testing.assert_array_equal(duplicates, source_ts[:2])
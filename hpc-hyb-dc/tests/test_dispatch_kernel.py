@@ -0,0 +1,29 @@
+import contextlib
+import io
+
+import pytest
+
+from battery import MegawattDataCenter, RealTimeBMS
+from battery_model import MegawattBattery
+
+BATTERIES = {
+    "lossless": dict(),
+    "lossy": dict(charge_efficiency=0.95, discharge_efficiency=0.94, taper_percent=10),
+}
+
+
+def run(reader, fast, hours=48, **battery_kwargs):
+    bms = RealTimeBMS(MegawattBattery(100, 50, **battery_kwargs), MegawattDataCenter(50), reader)
+    with contextlib.redirect_stdout(io.StringIO()) as out:
+        bms.run_realtime_simulation(hours=hours, fast=fast)
+    return bms, out.getvalue()
+
+
+@pytest.mark.parametrize("battery", BATTERIES)
+def test_fast_path_matches_python_loop(excess_reader, battery):
+    slow, slow_log = run(excess_reader, False, **BATTERIES[battery])
+    fast, fast_log = run(excess_reader, True, **BATTERIES[battery])
+    assert len(slow.history) == 48 * 12
+    assert fast.history.to_frame().equals(slow.history.to_frame())
+    assert fast_log == slow_log
+    assert fast.battery.current_charge == slow.battery.current_charge
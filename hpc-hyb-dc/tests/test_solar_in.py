@@ -0,0 +1,21 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from solar_in import simulate_one_day, simulate_one_day_scalar
+
+COLUMNS = ["AC_kW", "DC_kW", "POA_Irradiance_Wm2", "Module_Temp_C"]
+
+
+@pytest.mark.parametrize("sim_date", [date(2025, 4, 10), date(2025, 6, 21), date(2024, 9, 15)])
+@pytest.mark.parametrize("step_min", [5, 1])
+def test_array_engine_matches_scalar_loop(sim_date, step_min):
+    scalar = simulate_one_day_scalar(sim_date, step_min)
+    array = simulate_one_day(sim_date, step_min)
+    np.testing.assert_array_equal(array["Timestamp"].to_numpy(),
+                                  scalar["Timestamp"].to_numpy(dtype="datetime64[ns]"))
+    for col in COLUMNS:
+        np.testing.assert_allclose(array[col].to_numpy(), scalar[col].to_numpy(dtype=float),
+                                   rtol=1e-12, atol=1e-9, err_msg=col)
+    assert scalar["AC_kW"].max() > 0
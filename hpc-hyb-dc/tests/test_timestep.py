@@ -0,0 +1,44 @@
+import contextlib
+import io
+
+import pytest
+
+from battery import MegawattDataCenter, RealTimeBMS
+from battery_model import MegawattBattery
+from tariff import Tariff
+
+
+def run(reader, time_interval, hours, **kwargs):
+    battery = MegawattBattery(100, 50, charge_efficiency=0.95, discharge_efficiency=0.95)
+    bms = RealTimeBMS(battery, MegawattDataCenter(50), reader, time_interval=time_interval)
+    with contextlib.redirect_stdout(io.StringIO()):
+        bms.run_realtime_simulation(hours=hours, **kwargs)
+    return bms
+
+
+@pytest.mark.parametrize("time_interval, hours", [(None, 48), (1 / 60, 24), (1 / 3600, 6), (1.0, 48)])
+def test_event_driven_matches_fixed_step(excess_reader, time_interval, hours):
+    fixed = run(excess_reader, time_interval, hours, fast=True)
+    event = run(excess_reader, time_interval, hours, event_driven=True)
+    assert len(fixed.history) == fixed.intervals_for(hours)
+    assert event.history.to_frame().equals(fixed.history.to_frame())
+    assert event.battery.current_charge == fixed.battery.current_charge
+    assert event.evaluated_intervals <= fixed.intervals_for(hours)
+
+
+def test_event_driven_skips_steady_stretches(excess_reader):
+    event = run(excess_reader, 1 / 3600, 6, event_driven=True)
+    assert event.evaluated_intervals < event.intervals_for(6) / 2
+
+
+@pytest.mark.parametrize("time_interval", [1 / 60, 1.0])
+def test_fast_path_matches_python_loop_at_other_steps(excess_reader, time_interval):
+    slow = run(excess_reader, time_interval, 24, fast=False)
+    fast = run(excess_reader, time_interval, 24, fast=True)
+    assert fast.history.to_frame().equals(slow.history.to_frame())
+
+
+def test_tariff_for_another_step_is_rejected(excess_reader):
+    tariff = Tariff.from_hour_lists([0, 1], [18, 19], time_interval=1 / 60)
+    with pytest.raises(ValueError):
+        RealTimeBMS(MegawattBattery(), MegawattDataCenter(), excess_reader, tariff=tariff)